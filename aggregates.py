@@ -0,0 +1,45 @@
+# Daily per-account aggregates.
+# ഓരോ അക്കൗണ്ടിന്റെയും ദിവസേനയുള്ള ഡെപ്പോസിറ്റ്/വിത്ഡ്രോ തുകകളും എണ്ണവും daily_totals ടേബിളിൽ
+# ബാലൻസ് മാറ്റുന്ന അതേ ട്രാൻസാക്ഷനിൽ തന്നെ അപ്ഡേറ്റ് ചെയ്യുന്നു. ഈ ടൂൾ അവ കാണിക്കാനും
+# transactions ജേണലിൽ നിന്ന് മുഴുവനായി വീണ്ടും കണക്കാക്കാനും ഉപയോഗിക്കാം.
+#
+# Usage:
+#   python aggregates.py rebuild [--sqlite atm.db]
+#   python aggregates.py show <user_id> [--day 2024-01-31] [--sqlite atm.db]
+import argparse
+import time
+from datetime import date
+
+
+def main():
+    from storage import add_arguments, open_backend
+
+    # The storage options go after the subcommand, as in the usage above.
+    storage = argparse.ArgumentParser(add_help=False)
+    add_arguments(storage)
+    parser = argparse.ArgumentParser(description="Daily per-account totals")
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("rebuild", parents=[storage], help="recompute daily_totals from the transactions journal")
+    show = commands.add_parser("show", parents=[storage], help="print one account's totals for a day")
+    show.add_argument("user_id", type=int)
+    show.add_argument("--day", type=date.fromisoformat, help="YYYY-MM-DD, today by default")
+    args = parser.parse_args()
+    args.daily_totals = True
+
+    backend = open_backend(args)
+    try:
+        if args.command == "rebuild":
+            start = time.perf_counter()
+            rows = backend.rebuild_daily_totals()
+            print(f"✅ Rebuilt {rows} daily rows in {time.perf_counter() - start:.2f}s.")
+        else:
+            totals = backend.get_daily_totals(args.user_id, args.day)
+            print(f"{totals.day}  user {totals.user_id}")
+            print(f"Deposits:    {totals.deposit_count:>6}  ₹{totals.deposit_total:.2f}")
+            print(f"Withdrawals: {totals.withdraw_count:>6}  ₹{totals.withdraw_total:.2f}")
+    finally:
+        backend.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -2,52 +2,94 @@
 # Features: User Authentication, Balance Inquiry, Deposit, Withdrawal, Password Change, Transaction Logging
 # MySQL ലെ രണ്ട് ടേബിളുകളും ഇതിൽ ഉപയോഗിക്കുന്നുണ്ട്. ഓരോ ട്രാൻസാക്ഷൻസും കൃത്യമായി ട്രാൻസാക്ഷൻ എന്ന 
 # ടേബിളിൽ രേഖപ്പെടുത്തി വെയ്ക്കുന്നുണ്ട്.
-import mysql.connector
+#
+# With arguments it runs one operation and exits instead of showing the menu (see cli.py):
+#   python atm-update.py --user alice --op withdraw --amount 500 [--helper /tmp/atm.sock]
+import sys
+import time
+
+STARTED = time.perf_counter()
+if __name__ == "__main__" and len(sys.argv) > 1:
+    # Before the menu's imports: a run through --helper never loads the storage layer at all.
+    import cli
+    sys.exit(cli.main(journal=True, started=STARTED))
+
+import metrics
+from cache import CachedBackend
+from ledger import LedgerBackend
+from money import Money
+from pool import ConnectionPool, connection_errors, find_socket
+from recorder import RecordingService
+from service import AccountService, ATMError, AuthenticationFailed, LoginThrottled
+from storage import MySQLBackend
 
 class ATM:
-    def __init__(self, host, user, password, database):
+    def __init__(self, host, user, password, database, pool=None, journal_writer=None, backend=None,
+                 cache=None, daily_withdrawal_limit=None, passwords=None, recorder=None, ledger_path=None,
+                 throttle=None):
         self.db_host = host
         self.db_user = user
         self.db_password = password
         self.db_database = database
-        self.connection = None
-        self.cursor = None
+        # Many ATM sessions can share one pool; pass it in, or one is created in connect_db().
+        self.pool = pool
+        self.owns_pool = pool is None
+        # Optional journal.JournalWriter for group-committed transactions rows.
+        self.journal_writer = journal_writer
+        # A storage.StorageBackend (e.g. SQLiteBackend) replaces MySQL entirely when given.
+        self.backend = backend
+        # Optional cache.LRUCache for balances and user records.
+        self.cache = cache
+        # Needs the daily_totals table from atm-tables.txt.
+        self.daily_withdrawal_limit = daily_withdrawal_limit
+        # Optional passwords.PasswordHasher / PasswordVerifier; the default hashes in this thread.
+        self.passwords = passwords
+        # Optional recorder.OperationRecorder; every operation is logged for replay.py.
+        self.recorder = recorder
+        # Write-ahead log file for ledger.LedgerBackend: balances then live in memory and are
+        # checkpointed to MySQL in the background. Incompatible with daily_withdrawal_limit.
+        self.ledger_path = ledger_path
+        self.ledger = None
+        # Optional throttle.LoginThrottle; share its file with the other ATM processes on this host.
+        self.throttle = throttle
+        self.service = None
+        # service.AccountSession while someone is logged in.
         self.logged_in_user = None
 
     def connect_db(self):
-        """Establishes a connection to the database."""
+        """Creates the connection pool and checks that the database is reachable."""
+        if self.ledger_path is not None and self.daily_withdrawal_limit is not None:
+            # Refused here rather than on the first withdrawal.
+            raise ValueError("The ledger does not enforce daily withdrawal limits; "
+                             "pass ledger_path or daily_withdrawal_limit, not both.")
         try:
-            self.connection = mysql.connector.connect(
-                host=self.db_host,
-                user=self.db_user,
-                password=self.db_password,
-                database=self.db_database
-            )
-            self.cursor = self.connection.cursor(dictionary=True)
+            if self.backend is None:
+                if self.pool is None:
+                    self.pool = ConnectionPool(self.db_host, self.db_user, self.db_password, self.db_database,
+                                               unix_socket=find_socket(self.db_host))
+                with self.pool.connection():
+                    pass
+                self.backend = MySQLBackend(self.pool, daily_totals=self.daily_withdrawal_limit is not None)
+            if self.cache is not None:
+                self.backend = CachedBackend(self.backend, self.cache)
+            if self.ledger_path is not None:
+                self.ledger = self.backend = LedgerBackend(self.backend, self.ledger_path)
+            self.service = AccountService(self.backend, journal_writer=self.journal_writer,
+                                          daily_withdrawal_limit=self.daily_withdrawal_limit,
+                                          passwords=self.passwords, throttle=self.throttle)
+            if self.recorder is not None:
+                self.service = RecordingService(self.service, self.recorder)
             return True
-        except mysql.connector.Error as err:
+        except connection_errors() as err:
             print(f"Database connection failed: {err}")
             return False
 
     def close_db(self):
-        """Closes the database connection."""
-        if self.connection:
-            self.cursor.close()
-            self.connection.close()
-            
-    def _log_transaction(self, transaction_type, amount=None):
-        """Logs a transaction into the transactions table."""
-        if not self.logged_in_user:
-            return
-        
-        sql = "INSERT INTO transactions (user_id, transaction_type, amount) VALUES (%s, %s, %s)"
-        values = (self.logged_in_user['user_id'], transaction_type, amount)
-        
-        try:
-            self.cursor.execute(sql, values)
-            self.connection.commit()
-        except mysql.connector.Error as err:
-            print(f"Error logging transaction: {err}")
+        """Checkpoints the ledger, then closes the connection pool if this ATM created it."""
+        if self.ledger is not None:
+            self.ledger.stop()
+        if self.pool and self.owns_pool:
+            self.pool.close()
 
     def login(self):
         """Handles user login."""
@@ -55,16 +97,16 @@ class ATM:
         username = input("Enter username: ")
         password = input("Enter password: ")
 
-        self.cursor.execute("SELECT * FROM users WHERE username = %s AND password = %s", (username, password))
-        user_data = self.cursor.fetchone()
-
-        if user_data:
-            self.logged_in_user = user_data
-            print(f"\n✅ Login successful! Welcome, {self.logged_in_user['username']}!")
-            return True
-        else:
+        try:
+            self.logged_in_user = self.service.login(username, password)
+        except AuthenticationFailed:
             print("❌ Invalid username or password.")
             return False
+        except LoginThrottled as err:
+            print(f"⏳ {err}")
+            return False
+        print(f"\n✅ Login successful! Welcome, {self.logged_in_user.username}!")
+        return True
 
     def check_balance(self):
         """Displays the current account balance."""
@@ -72,9 +114,8 @@ class ATM:
             print("❌ Please log in first.")
             return
 
-        self.cursor.execute("SELECT balance FROM users WHERE user_id = %s", (self.logged_in_user['user_id'],))
-        current_balance = self.cursor.fetchone()['balance']
-        print(f"\nYour current balance is: ₹{current_balance:.2f}")
+        result = self.service.balance(self.logged_in_user.user_id)
+        print(f"\nYour current balance is: ₹{result.balance:.2f}")
 
     def deposit(self):
         """Handles depositing money into the account."""
@@ -83,19 +124,14 @@ class ATM:
             return
 
         try:
-            amount = float(input("Enter amount to deposit: "))
-            if amount <= 0:
-                print("❌ The amount must be greater than zero.")
-                return
-
-            self.cursor.execute("UPDATE users SET balance = balance + %s WHERE user_id = %s", (amount, self.logged_in_user['user_id']))
-            self.connection.commit()
+            amount = Money.parse(input("Enter amount to deposit: "))
+            result = self.service.deposit(self.logged_in_user.user_id, amount)
             print(f"✅ ₹{amount:.2f} has been deposited to your account.")
-            self._log_transaction('deposit', amount)
-            self.check_balance()
-
+            print(f"\nYour current balance is: ₹{result.balance:.2f}")
         except ValueError:
             print("❌ Invalid amount. Please enter a number.")
+        except ATMError as err:
+            print(f"❌ {err}")
             
     def withdraw(self):
         """Handles withdrawing money from the account."""
@@ -104,24 +140,31 @@ class ATM:
             return
 
         try:
-            amount = float(input("Enter amount to withdraw: "))
-            if amount <= 0:
-                print("❌ The amount must be greater than zero.")
-                return
+            amount = Money.parse(input("Enter amount to withdraw: "))
+            result = self.service.withdraw(self.logged_in_user.user_id, amount)
+            print(f"✅ ₹{amount:.2f} has been withdrawn.")
+            print(f"\nYour current balance is: ₹{result.balance:.2f}")
+        except ValueError:
+            print("❌ Invalid amount. Please enter a number.")
+        except ATMError as err:
+            print(f"❌ {err}")
 
-            self.cursor.execute("SELECT balance FROM users WHERE user_id = %s", (self.logged_in_user['user_id'],))
-            current_balance = self.cursor.fetchone()['balance']
+    def transfer(self):
+        """Moves money from this account to another account number."""
+        if not self.logged_in_user:
+            print("❌ Please log in first.")
+            return
 
-            if amount > current_balance:
-                print("❌ Insufficient balance.")
-            else:
-                self.cursor.execute("UPDATE users SET balance = balance - %s WHERE user_id = %s", (amount, self.logged_in_user['user_id']))
-                self.connection.commit()
-                print(f"✅ ₹{amount:.2f} has been withdrawn.")
-                self._log_transaction('withdraw', amount)
-                self.check_balance()
+        try:
+            to_user_id = int(input("Enter the account number to transfer to: "))
+            amount = Money.parse(input("Enter amount to transfer: "))
+            result = self.service.transfer(self.logged_in_user.user_id, to_user_id, amount)
+            print(f"✅ ₹{amount:.2f} has been transferred to account {to_user_id}.")
+            print(f"\nYour current balance is: ₹{result.balance:.2f}")
         except ValueError:
-            print("❌ Invalid amount. Please enter a number.")
+            print("❌ Invalid input. Please enter a number.")
+        except ATMError as err:
+            print(f"❌ {err}")
 
     def change_password(self):
         """Allows the user to change their password."""
@@ -130,10 +173,6 @@ class ATM:
             return
 
         current_password = input("Enter your current password: ")
-        if current_password != self.logged_in_user['password']:
-            print("❌ Incorrect current password.")
-            return
-
         new_password = input("Enter a new password: ")
         confirm_password = input("Confirm the new password: ")
         
@@ -141,15 +180,30 @@ class ATM:
             print("❌ New passwords do not match.")
             return
 
-        self.cursor.execute("UPDATE users SET password = %s WHERE user_id = %s", (new_password, self.logged_in_user['user_id']))
-        self.connection.commit()
-        self.logged_in_user['password'] = new_password
+        try:
+            self.service.change_password(self.logged_in_user.user_id, current_password, new_password)
+        except AuthenticationFailed as err:
+            print(f"❌ {err}")
+            return
         print("✅ Password changed successfully.")
-        self._log_transaction('password_change')
+
+    def mini_statement(self):
+        """Shows the last 10 entries from the transactions table."""
+        if not self.logged_in_user:
+            print("❌ Please log in first.")
+            return
+
+        entries = self.service.mini_statement(self.logged_in_user.user_id, 10)
+        print("\n--- Mini Statement ---")
+        if not entries:
+            print("No transactions yet.")
+        for entry in entries:
+            amount = f"₹{entry.amount:.2f}" if entry.amount is not None else ""
+            print(f"{entry.timestamp}  {entry.transaction_type:<16}{amount}")
 
     def logout(self):
         """Logs the user out."""
-        print(f"\nGoodbye, {self.logged_in_user['username']}! 👋")
+        print(f"\nGoodbye, {self.logged_in_user.username}! 👋")
         self.logged_in_user = None
 
     def display_menu(self):
@@ -159,6 +213,8 @@ class ATM:
         print("2. Deposit Money")
         print("3. Withdraw Money")
         print("4. Change Password")
+        print("5. Mini Statement")
+        print("6. Transfer Money")
         print("0. Logout")
 
     def run(self):
@@ -196,12 +252,17 @@ class ATM:
                     self.withdraw()
                 elif choice == '4':
                     self.change_password()
+                elif choice == '5':
+                    self.mini_statement()
+                elif choice == '6':
+                    self.transfer()
                 elif choice == '0':
                     self.logout()
                     break
                 else:
                     print("❌ Invalid choice. Please select a number from the menu.")
             except Exception as e:
+                metrics.REGISTRY.increment("menu_errors", type(e).__name__)
                 print(f"❌ An error occurred: {e}")
 
 if __name__ == "__main__":
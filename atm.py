@@ -1,58 +1,74 @@
-import mysql.connector
+# With arguments it runs one operation and exits (see cli.py): python atm.py --user alice --op balance
+import sys
+import time
+
+STARTED = time.perf_counter()
+if __name__ == "__main__" and len(sys.argv) > 1:
+    import cli
+    # This version keeps only the users table, so nothing is written to transactions.
+    sys.exit(cli.main(journal=False, started=STARTED))
+
+from money import Money
+from pool import ConnectionPool, connection_errors, find_socket
+from service import AccountService, ATMError, AuthenticationFailed, InsufficientFunds, InvalidAmount
+from storage import MySQLBackend
 
 class ATM:
-    def __init__(self, host, user, password, database):
+    def __init__(self, host, user, password, database, pool=None, backend=None):
         self.db_host = host
         self.db_user = user
         self.db_password = password
         self.db_database = database
-        self.connection = None
-        self.cursor = None
+        # Many ATM sessions can share one pool; pass it in, or one is created in connect_db().
+        self.pool = pool
+        self.owns_pool = pool is None
+        # A storage.StorageBackend (e.g. SQLiteBackend) replaces MySQL entirely when given.
+        self.backend = backend
+        self.service = None
+        # service.AccountSession while someone is logged in.
         self.logged_in_user = None
 
     def connect_db(self):
         try:
-            self.connection = mysql.connector.connect(
-                host=self.db_host,
-                user=self.db_user,
-                password=self.db_password,
-                database=self.db_database
-            )
-            self.cursor = self.connection.cursor(dictionary=True)
+            if self.backend is None:
+                if self.pool is None:
+                    self.pool = ConnectionPool(self.db_host, self.db_user, self.db_password, self.db_database,
+                                               unix_socket=find_socket(self.db_host))
+                # Borrow once so a wrong host or password is reported before the login prompt.
+                with self.pool.connection():
+                    pass
+                self.backend = MySQLBackend(self.pool)
+            # This version keeps only the users table, so nothing is written to transactions.
+            self.service = AccountService(self.backend, journal=False)
             return True
-        except mysql.connector.Error as err:
+        except connection_errors() as err:
             print(f"Database connection failed.: {err}")
             return False
 
     def close_db(self):
-        if self.connection:
-            self.cursor.close()
-            self.connection.close()
+        if self.pool and self.owns_pool:
+            self.pool.close()
             
     def login(self):
         print("\n--- Login ---")
         username = input("Enter the username: ")
         password = input("Enter the password: ")
 
-        self.cursor.execute("SELECT * FROM users WHERE username = %s AND password = %s", (username, password))
-        user_data = self.cursor.fetchone()
-
-        if user_data:
-            self.logged_in_user = user_data
-            print(f"\n✅ Login successful! Welcome, {self.logged_in_user['username']}!")
-            return True
-        else:
+        try:
+            self.logged_in_user = self.service.login(username, password)
+        except AuthenticationFailed:
             print("❌ Incorrect username or password.")
             return False
+        print(f"\n✅ Login successful! Welcome, {self.logged_in_user.username}!")
+        return True
 
     def check_balance(self):
         if not self.logged_in_user:
             print("❌ Please log in first.")
             return
 
-        self.cursor.execute("SELECT balance FROM users WHERE user_id = %s", (self.logged_in_user['user_id'],))
-        current_balance = self.cursor.fetchone()['balance']
-        print(f"\nCurrent balance in the account: ₹{current_balance:.2f}")
+        result = self.service.balance(self.logged_in_user.user_id)
+        print(f"\nCurrent balance in the account: ₹{result.balance:.2f}")
 
     def deposit(self):
         if not self.logged_in_user:
@@ -60,18 +76,15 @@ class ATM:
             return
 
         try:
-            amount = float(input("Enter the amount you wish to deposit: "))
-            if amount <= 0:
-                print("❌ The amount must be greater than zero.")
-                return
-
-            self.cursor.execute("UPDATE users SET balance = balance + %s WHERE user_id = %s", (amount, self.logged_in_user['user_id']))
-            self.connection.commit()
+            amount = Money.parse(input("Enter the amount you wish to deposit: "))
+            result = self.service.deposit(self.logged_in_user.user_id, amount)
             print(f"✅ ₹{amount:.2f} Deposited into your account.")
-            self.check_balance()
+            print(f"\nCurrent balance in the account: ₹{result.balance:.2f}")
 
         except ValueError:
             print("❌ Invalid amount. Please enter a number.")
+        except ATMError as err:
+            print(f"❌ {err}")
             
     def withdraw(self):
         if not self.logged_in_user:
@@ -79,23 +92,16 @@ class ATM:
             return
 
         try:
-            amount = float(input("Enter the amount you wish to withdraw:"))
-            if amount <= 0:
-                print("❌  The amount must be greater than zero. ")
-                return
-
-            self.cursor.execute("SELECT balance FROM users WHERE user_id = %s", (self.logged_in_user['user_id'],))
-            current_balance = self.cursor.fetchone()['balance']
-
-            if amount > current_balance:
-                print("❌ There is not enough money in the account.")
-            else:
-                self.cursor.execute("UPDATE users SET balance = balance - %s WHERE user_id = %s", (amount, self.logged_in_user['user_id']))
-                self.connection.commit()
-                print(f"✅ ₹{amount:.2f} Withdrawn.")
-                self.check_balance()
+            amount = Money.parse(input("Enter the amount you wish to withdraw:"))
+            result = self.service.withdraw(self.logged_in_user.user_id, amount)
+            print(f"✅ ₹{amount:.2f} Withdrawn.")
+            print(f"\nCurrent balance in the account: ₹{result.balance:.2f}")
         except ValueError:
             print("❌ Invalid amount. Please enter a number.")
+        except InvalidAmount:
+            print("❌  The amount must be greater than zero. ")
+        except InsufficientFunds:
+            print("❌ There is not enough money in the account.")
 
     def change_password(self):
         if not self.logged_in_user:
@@ -103,10 +109,6 @@ class ATM:
             return
 
         current_password = input("Enter current password.: ")
-        if current_password != self.logged_in_user['password']:
-            print("❌ The current password is incorrect.")
-            return
-
         new_password = input("Enter new password: ")
         confirm_password = input("Confirm new password: ")
         
@@ -114,13 +116,15 @@ class ATM:
             print("❌ The new passwords do not match.")
             return
 
-        self.cursor.execute("UPDATE users SET password = %s WHERE user_id = %s", (new_password, self.logged_in_user['user_id']))
-        self.connection.commit()
-        self.logged_in_user['password'] = new_password
+        try:
+            self.service.change_password(self.logged_in_user.user_id, current_password, new_password)
+        except AuthenticationFailed:
+            print("❌ The current password is incorrect.")
+            return
         print("✅ Password changed successfully.")
 
     def logout(self):
-        print(f"\nGoodbye, {self.logged_in_user['username']}! 👋")
+        print(f"\nGoodbye, {self.logged_in_user.username}! 👋")
         self.logged_in_user = None
 
     def display_menu(self):
@@ -0,0 +1,134 @@
+# Batch posting of end-of-day settlement files.
+# CSV അല്ലെങ്കിൽ JSONL ഫയലിലെ ഡെപ്പോസിറ്റുകളും വിത്ഡ്രോകളും ജനറേറ്റർ പൈപ്പ്‌ലൈൻ വഴി വായിച്ച്,
+# ചങ്കുകളായി ഒറ്റ ട്രാൻസാക്ഷനിൽ അപ്ലൈ ചെയ്യുന്നു. ഫയൽ എത്ര വലുതായാലും മെമ്മറി ഉപയോഗം ഒരു ചങ്കിന്റേത് മാത്രം.
+#
+# Input columns (CSV header or JSONL keys): user_id, transaction_type (deposit | withdraw), amount
+# Usage: python batch.py postings.csv --report rejected.csv [--chunk-size 5000] [--sqlite atm.db]
+import argparse
+import csv
+import json
+import time
+from itertools import islice
+
+from money import Money
+
+TRANSACTION_TYPES = ('deposit', 'withdraw')
+
+
+def read_records(path):
+    """Yields (line_number, record) from a CSV or JSONL file, one line at a time.
+
+    A JSONL line that is not valid JSON is yielded as None, so it is rejected with its line number.
+    """
+    with open(path, newline='', encoding='utf-8') as f:
+        if path.endswith(('.jsonl', '.json')):
+            for line_number, line in enumerate(f, 1):
+                if line.strip():
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        record = None
+                    yield line_number, record
+        else:
+            for line_number, row in enumerate(csv.DictReader(f), 2):
+                yield line_number, row
+
+
+def parse_postings(records, rejects):
+    """Yields (line_number, (user_id, transaction_type, amount)); bad lines go to `rejects`."""
+    for line_number, record in records:
+        if not isinstance(record, dict):
+            rejects.writerow([line_number, None, None, None, "invalid line"])
+            continue
+        try:
+            user_id = int(record['user_id'])
+            transaction_type = str(record['transaction_type']).strip().lower()
+            amount = Money.parse(str(record['amount']))
+        except (KeyError, ValueError, TypeError):
+            rejects.writerow([line_number, record.get('user_id'), record.get('transaction_type'),
+                              record.get('amount'), "invalid line"])
+            continue
+        if transaction_type not in TRANSACTION_TYPES or not amount > 0:
+            rejects.writerow([line_number, user_id, transaction_type, amount, "invalid line"])
+            continue
+        yield line_number, (user_id, transaction_type, amount)
+
+
+def chunks(iterable, size):
+    """Yields lists of at most `size` items."""
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def post_file(backend, path, report_path, chunk_size=5000, progress=None):
+    """Applies every posting in `path` and writes rejected lines to `report_path`.
+
+    Returns a dict with row counts, elapsed seconds and rows per second.
+    """
+    start = time.perf_counter()
+    rows = accepted = rejected = 0
+    with open(report_path, 'w', newline='', encoding='utf-8') as report:
+        rejects = csv.writer(report)
+        rejects.writerow(['line', 'user_id', 'transaction_type', 'amount', 'reason'])
+        invalid = _CountingWriter(rejects)
+        for chunk in chunks(parse_postings(read_records(path), invalid), chunk_size):
+            postings = [posting for _, posting in chunk]
+            failures = backend.apply_postings(postings)
+            for index, reason in failures:
+                line_number, (user_id, transaction_type, amount) = chunk[index]
+                rejects.writerow([line_number, user_id, transaction_type, amount, reason])
+            rows += len(chunk)
+            rejected += len(failures)
+            accepted += len(chunk) - len(failures)
+            if progress:
+                progress(rows, time.perf_counter() - start)
+    elapsed = time.perf_counter() - start
+    rows += invalid.count
+    rejected += invalid.count
+    return {
+        "rows": rows,
+        "accepted": accepted,
+        "rejected": rejected,
+        "elapsed": elapsed,
+        "rows_per_second": rows / elapsed if elapsed else 0.0,
+    }
+
+
+class _CountingWriter:
+    """csv.writer wrapper that counts the invalid lines written to the report."""
+
+    def __init__(self, writer):
+        self.writer = writer
+        self.count = 0
+
+    def writerow(self, row):
+        self.count += 1
+        self.writer.writerow(row)
+
+
+def main():
+    from storage import add_arguments, open_backend
+
+    parser = argparse.ArgumentParser(description="Apply a file of deposits and withdrawals")
+    parser.add_argument("path", help="CSV or JSONL postings file")
+    parser.add_argument("--report", default="rejected.csv", help="where rejected lines are written")
+    parser.add_argument("--chunk-size", type=int, default=5000)
+    add_arguments(parser)
+    args = parser.parse_args()
+
+    backend = open_backend(args)
+    try:
+        summary = post_file(backend, args.path, args.report, args.chunk_size,
+                            progress=lambda rows, elapsed: print(f"{rows} rows, {rows / elapsed:.0f} rows/s"))
+    finally:
+        backend.close()
+    print(f"✅ {summary['accepted']} postings applied, {summary['rejected']} rejected "
+          f"({summary['rows_per_second']:.0f} rows/s, {summary['elapsed']:.2f}s). Rejections: {args.report}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,623 @@
+# Benchmarks for the ATM operations.
+# atm-tables.txt ലെ users ടേബിളിന്റെ അതേ രൂപത്തിൽ N സിന്തറ്റിക് യൂസർമാരെ ചേർത്ത്, നിശ്ചിത
+# ഓപ്പറേഷൻ മിക്സ് ഒരേസമയം പല വർക്കർമാരെ കൊണ്ട് ഓടിക്കുന്നു. ഓരോ ഓപ്പറേഷന്റെയും throughput ഉം
+# p50/p95/p99 latency യും JSON ആയി എഴുതുന്നതിനാൽ കമ്മിറ്റുകൾ തമ്മിൽ താരതമ്യം ചെയ്യാം.
+#
+# Usage:
+#   python bench.py workload --sqlite :memory: --users 1000 --workers 8 --ops 20000 \
+#       --mix balance=70,withdraw=20,deposit=10 --output results.json [--baseline old.json] [--record ops.jsonl]
+#   python bench.py passwords --costs 100000,300000,600000 --workers 8 --hash-workers 4
+#   python bench.py transfers --sqlite :memory: --users 10 --workers 16 --ops 20000
+#   python bench.py money --postings 1000000
+#   python bench.py sessions --sessions 100000
+#   python bench.py startup --runs 20 [-- --db-socket /run/mysqld/mysqld.sock]
+#   python bench.py statements --db-name atm_db --users 1000 --workers 8 --ops 20000
+#   python bench.py ledger --db-name atm_db --workers 8 --ops 20000 --recovery-records 100000
+import argparse
+import json
+import os
+import random
+import subprocess
+import sys
+import threading
+import time
+from decimal import Decimal
+
+import metrics
+from money import Money
+from passwords import PBKDF2, SCRYPT, PasswordHasher, PasswordVerifier
+from service import AccountService
+
+OPERATIONS = ('login', 'balance', 'deposit', 'withdraw', 'transfer', 'journal')
+BENCH_PASSWORD = "bench-password"
+
+
+def percentile(sorted_values, fraction):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, int(round(fraction * len(sorted_values))) - 1))
+    return sorted_values[index]
+
+
+def summarize(latencies, elapsed, errors=0):
+    """Throughput and latency percentiles (milliseconds) for one list of timings in seconds."""
+    latencies = sorted(latencies)
+    count = len(latencies)
+    return {
+        "count": count,
+        "errors": errors,
+        "throughput": count / elapsed if elapsed else 0.0,
+        "mean_ms": sum(latencies) / count * 1000 if count else 0.0,
+        "p50_ms": percentile(latencies, 0.50) * 1000,
+        "p95_ms": percentile(latencies, 0.95) * 1000,
+        "p99_ms": percentile(latencies, 0.99) * 1000,
+    }
+
+
+def parse_mix(text):
+    """Parses 'balance=70,withdraw=20,deposit=10' into a {operation: weight} dict."""
+    mix = {}
+    for part in text.split(","):
+        name, _, weight = part.partition("=")
+        name = name.strip()
+        if name not in OPERATIONS:
+            raise ValueError(f"Unknown operation in mix: {name}")
+        mix[name] = float(weight)
+    return mix
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def seed_users(backend, count, balance=1000000, prefix="bench_user_", hasher=None):
+    """Inserts `count` synthetic users and returns [(user_id, username)].
+
+    Every user shares one hash of BENCH_PASSWORD, so seeding does not pay the hash cost per row.
+    """
+    password_hash = (hasher or PasswordHasher()).hash(BENCH_PASSWORD)
+    names = [f"{prefix}{i}" for i in range(count)]
+    for start in range(0, count, 5000):
+        backend.add_users([(name, password_hash, balance) for name in names[start:start + 5000]])
+    return [(backend.find_user(name).user_id, name) for name in names]
+
+
+def run_workload(service, users, mix, workers=4, ops_per_worker=1000, seed=1):
+    """Replays the operation mix with `workers` threads; returns (timings, errors, elapsed).
+
+    Each worker uses its own seeded Random, so the same arguments replay the same operations.
+    An exception other than ATMError counts as an error of its operation, so a failing
+    worker keeps going and its timings are not lost.
+    """
+    if mix.get('transfer') and len(users) < 2:
+        raise ValueError("A mix with transfers needs at least 2 users.")
+    names = list(mix)
+    weights = [mix[name] for name in names]
+    timings = {name: [] for name in names}
+    errors = {name: 0 for name in names}
+    lock = threading.Lock()
+    barrier = threading.Barrier(workers + 1)
+
+    def worker(index):
+        rng = random.Random(seed * 1000003 + index)
+        local_timings = {name: [] for name in names}
+        local_errors = {name: 0 for name in names}
+        barrier.wait()
+        for _ in range(ops_per_worker):
+            operation = rng.choices(names, weights)[0]
+            user_id, username = users[rng.randrange(len(users))]
+            amount = Money(rng.randint(1, 10000))
+            start = time.perf_counter()
+            try:
+                if operation == 'login':
+                    service.login(username, BENCH_PASSWORD)
+                elif operation == 'balance':
+                    service.balance(user_id)
+                elif operation == 'deposit':
+                    service.deposit(user_id, amount)
+                elif operation == 'withdraw':
+                    service.withdraw(user_id, amount)
+                elif operation == 'transfer':
+                    other = users[rng.randrange(len(users) - 1)][0]
+                    service.transfer(user_id, other if other != user_id else users[-1][0], amount)
+                else:
+                    service.backend.append_journal([(user_id, 'deposit', amount)])
+            except Exception:
+                local_errors[operation] += 1
+            local_timings[operation].append(time.perf_counter() - start)
+        with lock:
+            for name in names:
+                timings[name].extend(local_timings[name])
+                errors[name] += local_errors[name]
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(workers)]
+    for thread in threads:
+        thread.start()
+    barrier.wait()
+    start = time.perf_counter()
+    for thread in threads:
+        thread.join()
+    return timings, errors, time.perf_counter() - start
+
+
+def print_table(results):
+    print(f"{'operation':<12}{'count':>9}{'errors':>8}{'ops/s':>12}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+    for name, row in results.items():
+        print(f"{name:<12}{row['count']:>9}{row['errors']:>8}{row['throughput']:>12.0f}"
+              f"{row['p50_ms']:>10.3f}{row['p95_ms']:>10.3f}{row['p99_ms']:>10.3f}")
+
+
+def compare(results, baseline):
+    """Prints throughput and p99 change against a previous results file."""
+    print(f"\nAgainst baseline {baseline.get('commit')}:")
+    for name, row in results.items():
+        old = baseline.get("results", {}).get(name)
+        if "throughput" not in row or not old or not old["throughput"] or not old["p99_ms"]:
+            continue
+        throughput = (row["throughput"] / old["throughput"] - 1) * 100
+        p99 = (row["p99_ms"] / old["p99_ms"] - 1) * 100
+        print(f"{name:<12} throughput {throughput:+.1f}%   p99 {p99:+.1f}%")
+
+
+def write_results(path, suite, config, results):
+    document = {
+        "suite": suite,
+        "commit": git_commit(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "config": config,
+        "results": results,
+    }
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(document, f, indent=2, default=str)
+
+
+def bench_workload(args):
+    from recorder import OperationRecorder, RecordingService
+    from storage import open_backend
+
+    backend = open_backend(args)
+    recorder = None
+    try:
+        users = seed_users(backend, args.users) if args.seed_users else [
+            (backend.find_user(f"bench_user_{i}").user_id, f"bench_user_{i}")
+            for i in range(args.users)]
+        service = AccountService(backend)
+        if args.record:
+            recorder = OperationRecorder(args.record)
+            service = RecordingService(service, recorder)
+        mix = parse_mix(args.mix)
+        timings, errors, elapsed = run_workload(service, users, mix, args.workers, args.ops // args.workers,
+                                                args.seed)
+    finally:
+        if recorder is not None:
+            recorder.close()
+        backend.close()
+
+    results = {name: summarize(timings[name], elapsed, errors[name]) for name in mix}
+    results["total"] = summarize([t for name in mix for t in timings[name]], elapsed,
+                                 sum(errors.values()))
+    print_table(results)
+    if metrics.REGISTRY.enabled:
+        results["metrics"] = metrics.REGISTRY.snapshot()
+    config = {key: value for key, value in vars(args).items() if key not in ("db_password", "func")}
+    return "workload", config, results
+
+
+def bench_transfers(args):
+    """Random transfers among a few accounts from many threads; the total balance must not change."""
+    from storage import open_backend
+
+    backend = open_backend(args)
+    try:
+        users = seed_users(backend, args.users, balance=args.balance, prefix="transfer_user_")
+        total_before = sum(backend.get_balance(user_id) for user_id, _ in users)
+        timings, errors, elapsed = run_workload(AccountService(backend), users, {'transfer': 1}, args.workers,
+                                                args.ops // args.workers, args.seed)
+        total_after = sum(backend.get_balance(user_id) for user_id, _ in users)
+    finally:
+        backend.close()
+
+    results = {"transfer": summarize(timings['transfer'], elapsed, errors['transfer'])}
+    print_table(results)
+    conserved = total_before == total_after
+    print(f"\nTotal balance before ₹{total_before:.2f}, after ₹{total_after:.2f}: "
+          + ("✅ conserved" if conserved else "❌ NOT conserved"))
+    results["conservation"] = {"before": str(total_before), "after": str(total_after), "conserved": conserved}
+    config = {key: value for key, value in vars(args).items() if key not in ("db_password", "func")}
+    return "transfers", config, results
+
+
+def bench_statements(args):
+    """The same workload with prepared statements and then as text, per-operation latency side by side."""
+    from storage import open_backend
+
+    mix = parse_mix(args.mix)
+    results = {}
+    for mode, text_protocol in (("prepared", False), ("text", True)):
+        args.text_protocol = text_protocol
+        backend = open_backend(args)
+        try:
+            users = seed_users(backend, args.users, prefix=f"{mode}_user_")
+            timings, errors, elapsed = run_workload(AccountService(backend), users, mix, args.workers,
+                                                    args.ops // args.workers, args.seed)
+            statements = getattr(backend, "statements", None)
+        finally:
+            backend.close()
+        for name in mix:
+            results[f"{name}-{mode}"] = summarize(timings[name], elapsed, errors[name])
+        if statements is not None:
+            results[f"statements-{mode}"] = statements.stats()
+
+    print(f"{'operation':<12}{'p50 prep':>10}{'p50 text':>10}{'p99 prep':>10}{'p99 text':>10}{'p50 diff':>10}")
+    for name in mix:
+        prepared, text = results[f"{name}-prepared"], results[f"{name}-text"]
+        change = (prepared["p50_ms"] / text["p50_ms"] - 1) * 100 if text["p50_ms"] else 0.0
+        print(f"{name:<12}{prepared['p50_ms']:>10.3f}{text['p50_ms']:>10.3f}"
+              f"{prepared['p99_ms']:>10.3f}{text['p99_ms']:>10.3f}{change:>+9.1f}%")
+    if "statements-prepared" in results:
+        print(f"\nStatement cache: {results['statements-prepared']}")
+    config = {key: value for key, value in vars(args).items() if key not in ("db_password", "func")}
+    return "statements", config, results
+
+
+def bench_ledger(args):
+    """Workload straight to the backend and through the ledger in each sync mode, then crash recovery."""
+    import tempfile
+
+    from ledger import LedgerBackend
+    from storage import open_backend
+
+    mix = parse_mix(args.mix)
+    modes = args.modes.split(",")
+    args.ledger = None
+    directory = args.wal_dir or tempfile.mkdtemp(prefix="atm-ledger-")
+    results = {}
+    for mode in modes:
+        backend = open_backend(args)
+        stats = None
+        try:
+            users = seed_users(backend, args.users, prefix=f"{mode}_user_")
+            if mode != "direct":
+                wal = os.path.join(directory, f"{mode}.wal")
+                if os.path.exists(wal):
+                    os.remove(wal)
+                backend = LedgerBackend(backend, wal, args.ledger_slots, mode, args.checkpoint_interval)
+            timings, errors, elapsed = run_workload(AccountService(backend), users, mix, args.workers,
+                                                    args.ops // args.workers, args.seed)
+            if mode != "direct":
+                stats = backend.stats()
+        finally:
+            backend.close()
+        results[mode] = summarize([t for name in mix for t in timings[name]], elapsed, sum(errors.values()))
+        if stats:
+            results[f"{mode}-ledger"] = stats
+    print_table({mode: results[mode] for mode in modes})
+    if "direct" in results:
+        for mode in modes:
+            if mode != "direct" and results["direct"]["throughput"]:
+                print(f"{mode:<12} {results[mode]['throughput'] / results['direct']['throughput']:.1f}x "
+                      "the throughput of direct")
+
+    backend = open_backend(args)
+    try:
+        users = seed_users(backend, args.users, prefix="recovery_user_")
+        wal = os.path.join(directory, "recovery.wal")
+        if os.path.exists(wal):
+            os.remove(wal)
+        # Big enough that no checkpoint starts: every record has to be replayed.
+        slots = max(args.ledger_slots, 2 * args.recovery_records + 2)
+        crashed = LedgerBackend(backend, wal, slots, "async", checkpoint_interval=3600)
+        rng = random.Random(args.seed)
+        for _ in range(args.recovery_records):
+            amount = Money(rng.randint(1, 10000))
+            crashed.post(users[rng.randrange(len(users))][0], amount, ('deposit', amount))
+        expected = {user_id: crashed.get_balance(user_id) for user_id, _ in users}
+        # Abandoned without stop(), so there is no final checkpoint: as after kill -9.
+        start = time.perf_counter()
+        recovered = LedgerBackend(backend, wal, slots, "async", checkpoint_interval=3600)
+        elapsed = time.perf_counter() - start
+        matches = all(recovered.get_balance(user_id) == balance for user_id, balance in expected.items())
+        replayed = recovered.stats()["recovered"]
+        recovered.stop()
+    finally:
+        backend.close()
+    results["recovery"] = {"records": replayed, "seconds": elapsed,
+                           "records_per_second": replayed / elapsed if elapsed else 0.0, "balances_match": matches}
+    print(f"\nRecovery: {replayed} records replayed and checkpointed in {elapsed:.3f}s "
+          f"({results['recovery']['records_per_second']:.0f} records/s); "
+          f"balances {'match' if matches else 'DO NOT MATCH'}.")
+    config = {key: value for key, value in vars(args).items() if key not in ("db_password", "func")}
+    return "ledger", config, results
+
+
+def settle_loop(texts, users, parse, opening):
+    """The shape of a bulk posting run: parse each amount, then credit or overdraft-checked debit."""
+    balances = [opening] * users
+    start = time.perf_counter()
+    for index, text in enumerate(texts):
+        amount = parse(text)
+        user = index % users
+        if index % 3:
+            balances[user] = balances[user] + amount
+        elif balances[user] >= amount:
+            balances[user] = balances[user] - amount
+    return time.perf_counter() - start, balances
+
+
+def bench_money(args):
+    """Money against Decimal in a single-threaded bulk posting loop."""
+    rng = random.Random(args.seed)
+    texts = [f"{rng.randint(1, 10000000) / 100:.2f}" for _ in range(args.postings)]
+    cents = Decimal("0.01")
+    variants = {
+        "decimal": (lambda text: Decimal(text).quantize(cents), Decimal("100000.00")),
+        "money": (Money.parse, Money(10000000)),
+        # What SQLiteBackend does after the edge: parse once, then plain int arithmetic.
+        "paise": (lambda text: Money.parse(text).paise, 10000000),
+    }
+    results = {}
+    totals = {}
+    for name, (parse, opening) in variants.items():
+        elapsed, balances = settle_loop(texts, args.users, parse, opening)
+        total = sum(balances, opening - opening)
+        totals[name] = str(Money(total) if name == "paise" else total)
+        results[name] = {
+            "count": len(texts),
+            "throughput": len(texts) / elapsed,
+            "ns_per_posting": elapsed / len(texts) * 1e9,
+            "bytes_per_amount": sys.getsizeof(parse(texts[0])),
+        }
+
+    print(f"{'type':<12}{'postings/s':>14}{'ns/posting':>12}{'bytes/amount':>14}")
+    for name, row in results.items():
+        print(f"{name:<12}{row['throughput']:>14.0f}{row['ns_per_posting']:>12.0f}{row['bytes_per_amount']:>14}")
+    print(f"\nFinal totals {'agree' if len(set(totals.values())) == 1 else 'DIFFER'}: {totals}")
+    config = {key: value for key, value in vars(args).items() if key != "func"}
+    return "money", config, results
+
+
+def bench_sessions(args):
+    """Memory held per logged-in session and the cost of decoding one users row, dict rows against records."""
+    import tracemalloc
+
+    from service import AccountSession
+    from storage import UserRow
+
+    columns = UserRow._fields
+    encoded = PasswordHasher(iterations=1000).hash(BENCH_PASSWORD)
+    variants = {
+        # Before: cursor(dictionary=True) + SELECT *, the whole dict kept as ATM.logged_in_user.
+        "dict-row": lambda row: dict(zip(columns, row)),
+        # What find_user() returns now.
+        "userrow": UserRow._make,
+        # What login() returns and the session keeps: no password, no balance.
+        "session": lambda row: AccountSession(row[0], row[1]),
+    }
+    results = {}
+    for name, decode in variants.items():
+        tracemalloc.start()
+        sessions = []
+        for i in range(args.sessions):
+            # Fresh strings per row, as the driver hands them over; whatever decode() drops is freed.
+            row = (i + 1000, f"bench_user_{i}", encoded[:-8] + f"{i:08d}", Money(i))
+            sessions.append(decode(row))
+        del row
+        held = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        del sessions
+
+        row = (1000, "bench_user_0", encoded, Money(100))
+        start = time.perf_counter()
+        for _ in range(args.decodes):
+            decode(row)
+        elapsed = time.perf_counter() - start
+        results[name] = {
+            "count": args.decodes,
+            "bytes_per_session": held / args.sessions,
+            "ns_per_decode": elapsed / args.decodes * 1e9,
+        }
+
+    print(f"{'record':<12}{'bytes/session':>15}{'ns/decode':>12}")
+    for name, row in results.items():
+        print(f"{name:<12}{row['bytes_per_session']:>15.0f}{row['ns_per_decode']:>12.0f}")
+    config = {key: value for key, value in vars(args).items() if key != "func"}
+    return "sessions", config, results
+
+
+def bench_startup(args):
+    """Wall time of one scripted `atm-update.py --op balance` process: bare interpreter, direct and via a helper.
+
+    Everything after `--` selects the database (default: a fresh SQLite file) and is passed to
+    both atm-update.py and the helper server. The hash cost is kept low so the numbers show
+    start-up, not PBKDF2.
+    """
+    import tempfile
+
+    from storage import add_arguments, open_backend
+
+    here = os.path.dirname(os.path.abspath(__file__))
+    workdir = tempfile.mkdtemp(prefix="atm-startup-")
+    target = [arg for arg in args.target if arg != "--"] or ["--sqlite", os.path.join(workdir, "atm.db")]
+    hashing = ["--hash-iterations", str(args.hash_iterations)]
+    storage_options = argparse.ArgumentParser()
+    add_arguments(storage_options)
+    backend = open_backend(storage_options.parse_args(target))
+    try:
+        [(_, username)] = seed_users(backend, 1, prefix=f"startup_user_{os.getpid()}_",
+                                     hasher=PasswordHasher(iterations=args.hash_iterations))
+    finally:
+        backend.close()
+
+    socket_path = os.path.join(workdir, "atm.sock")
+    helper = subprocess.Popen([sys.executable, os.path.join(here, "server.py"), "--unix", socket_path]
+                              + target + hashing)
+    env = dict(os.environ, ATM_PASSWORD=BENCH_PASSWORD)
+    scripted = [sys.executable, os.path.join(here, "atm-update.py"), "--user", username, "--op", "balance"]
+    commands = {
+        "interpreter": [sys.executable, "-c", "pass"],
+        "direct": scripted + target + hashing,
+        "helper": scripted + ["--helper", socket_path],
+    }
+    results = {}
+    try:
+        deadline = time.monotonic() + 10
+        while not os.path.exists(socket_path) and time.monotonic() < deadline:
+            time.sleep(0.05)
+        for name, command in commands.items():
+            timings, errors = [], 0
+            # The first run warms the OS file cache and is not counted.
+            for run in range(args.runs + 1):
+                start = time.perf_counter()
+                done = subprocess.run(command, env=env, capture_output=True, text=True)
+                elapsed = time.perf_counter() - start
+                if done.returncode != 0 or (name != "interpreter" and not done.stdout.startswith("OK")):
+                    errors += 1
+                elif run:
+                    timings.append(elapsed)
+            results[name] = summarize(timings, sum(timings), errors)
+    finally:
+        helper.terminate()
+        helper.wait()
+
+    print_table(results)
+    config = {key: value for key, value in vars(args).items() if key != "func"}
+    return "startup", config, results
+
+
+def bench_passwords(args):
+    """Login throughput at each hash cost, hashing in session threads or in worker processes."""
+    from storage import MemoryBackend
+
+    results = {}
+    for cost in (int(value) for value in args.costs.split(",")):
+        if args.algorithm == PBKDF2:
+            hasher = PasswordHasher(PBKDF2, iterations=cost)
+        else:
+            hasher = PasswordHasher(SCRYPT, n=cost)
+        backend = MemoryBackend()
+        users = seed_users(backend, args.users, hasher=hasher)
+        verifier = PasswordVerifier(hasher, args.hash_workers) if args.hash_workers else hasher
+        try:
+            service = AccountService(backend, passwords=verifier)
+            timings, errors, elapsed = run_workload(service, users, {'login': 1}, args.workers,
+                                                    args.logins // args.workers)
+        finally:
+            verifier.close()
+        row = summarize(timings['login'], elapsed, errors['login'])
+        cores = min(args.hash_workers or args.workers, os.cpu_count() or 1)
+        row["cores"] = cores
+        row["per_core"] = row["throughput"] / cores
+        results[f"{args.algorithm.split('_')[0]}-{cost}"] = row
+
+    print_table(results)
+    print()
+    for name, row in results.items():
+        print(f"{name:<24} {row['per_core']:>8.1f} logins/s per core ({row['cores']} cores)")
+    config = {key: value for key, value in vars(args).items() if key != "func"}
+    return "passwords", config, results
+
+
+def main():
+    from storage import add_arguments
+
+    parser = argparse.ArgumentParser(description="ATM benchmarks")
+    parser.add_argument("--output", help="write machine-readable results to this JSON file")
+    parser.add_argument("--baseline", help="compare against a previous JSON results file")
+    suites = parser.add_subparsers(dest="suite", required=True)
+
+    workload = suites.add_parser("workload", help="concurrent operation mix against a backend")
+    workload.add_argument("--users", type=int, default=1000)
+    workload.add_argument("--workers", type=int, default=4)
+    workload.add_argument("--ops", type=int, default=20000, help="total operations across all workers")
+    workload.add_argument("--mix", default="balance=70,withdraw=20,deposit=10")
+    workload.add_argument("--seed", type=int, default=1)
+    workload.add_argument("--no-seed-users", dest="seed_users", action="store_false",
+                          help="reuse bench_user_* accounts from an earlier run")
+    workload.add_argument("--record", metavar="PATH", help="log the operations for replay.py")
+    add_arguments(workload)
+    workload.set_defaults(func=bench_workload)
+
+    transfers = suites.add_parser("transfers", help="concurrent transfers; checks that money is conserved")
+    transfers.add_argument("--users", type=int, default=10, help="few accounts means heavy lock contention")
+    transfers.add_argument("--balance", type=int, default=1000)
+    transfers.add_argument("--workers", type=int, default=16)
+    transfers.add_argument("--ops", type=int, default=20000, help="total transfers across all workers")
+    transfers.add_argument("--seed", type=int, default=1)
+    add_arguments(transfers)
+    transfers.set_defaults(func=bench_transfers)
+
+    statements = suites.add_parser("statements", help="workload with prepared statements against text protocol")
+    statements.add_argument("--users", type=int, default=1000)
+    statements.add_argument("--workers", type=int, default=4)
+    statements.add_argument("--ops", type=int, default=20000, help="total operations per mode")
+    statements.add_argument("--mix", default="balance=60,withdraw=15,deposit=15,transfer=10")
+    statements.add_argument("--seed", type=int, default=1)
+    add_arguments(statements)
+    statements.set_defaults(func=bench_statements)
+
+    ledger = suites.add_parser("ledger", help="deposits and withdrawals through the write-ahead ledger, and recovery")
+    ledger.add_argument("--users", type=int, default=1000)
+    ledger.add_argument("--workers", type=int, default=8)
+    ledger.add_argument("--ops", type=int, default=20000, help="total operations per mode")
+    ledger.add_argument("--mix", default="deposit=45,withdraw=45,balance=10")
+    ledger.add_argument("--seed", type=int, default=1)
+    ledger.add_argument("--modes", default="direct,sync,group,async",
+                        help="direct (no ledger) and ledger sync modes to compare")
+    ledger.add_argument("--recovery-records", type=int, default=100000, help="log records to replay after a crash")
+    ledger.add_argument("--wal-dir", help="directory for the log files (default: a new temporary directory)")
+    add_arguments(ledger)
+    ledger.set_defaults(func=bench_ledger)
+
+    money = suites.add_parser("money", help="Money against Decimal in a bulk posting loop")
+    money.add_argument("--postings", type=int, default=1000000)
+    money.add_argument("--users", type=int, default=1000)
+    money.add_argument("--seed", type=int, default=1)
+    money.set_defaults(func=bench_money)
+
+    sessions = suites.add_parser("sessions", help="memory per logged-in session and row decoding cost")
+    sessions.add_argument("--sessions", type=int, default=100000, help="concurrent sessions to hold")
+    sessions.add_argument("--decodes", type=int, default=1000000)
+    sessions.set_defaults(func=bench_sessions)
+
+    startup = suites.add_parser("startup", help="process start-up of scripted atm-update.py runs")
+    startup.add_argument("--runs", type=int, default=20)
+    startup.add_argument("--hash-iterations", type=int, default=1000)
+    startup.add_argument("target", nargs=argparse.REMAINDER, help="-- then storage options, e.g. -- --sqlite atm.db")
+    startup.set_defaults(func=bench_startup)
+
+    hashing = suites.add_parser("passwords", help="login throughput at each password hash cost")
+    hashing.add_argument("--algorithm", choices=(PBKDF2, SCRYPT), default=PBKDF2)
+    hashing.add_argument("--costs", default="10000,100000,600000",
+                         help="comma-separated PBKDF2 iterations (or scrypt n values)")
+    hashing.add_argument("--users", type=int, default=100)
+    hashing.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="concurrent session threads")
+    hashing.add_argument("--logins", type=int, default=400, help="logins per cost level")
+    hashing.add_argument("--hash-workers", type=int, default=0,
+                         help="verify in this many worker processes (0 verifies in the session threads)")
+    hashing.set_defaults(func=bench_passwords)
+
+    args = parser.parse_args()
+    if args.suite in ("workload", "statements", "ledger", "transfers") and args.users < 2:
+        try:
+            transfers = args.suite == "transfers" or parse_mix(args.mix).get("transfer")
+        except ValueError as err:
+            parser.error(str(err))
+        if transfers:
+            parser.error("a mix with transfers needs at least 2 --users")
+    suite, config, results = args.func(args)
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            compare(results, json.load(f))
+    if args.output:
+        write_results(args.output, suite, config, results)
+    if not results.get("conservation", {}).get("conserved", True):
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,241 @@
+# Read-through cache of user records and balances.
+# ഓരോ check_balance() നും login() നും ഡാറ്റാബേസിൽ പോകുന്നതിനു പകരം, ഈ പ്രോസസ്സിൽ തന്നെ
+# LRU + TTL കാഷ് സൂക്ഷിക്കുന്നു. നമ്മുടെ സ്വന്തം deposit/withdraw/transfer ബാലൻസ് എൻട്രി ഉടനെ
+# നീക്കം ചെയ്യുന്നതിനാൽ, അടുത്ത വായന ഡാറ്റാബേസിൽ നിന്ന് പുതിയ ബാലൻസ് എടുക്കും.
+#
+# Writes made by other processes are only seen after `ttl` seconds.
+import sys
+import threading
+import time
+from collections import OrderedDict
+
+from storage import StorageBackend
+
+_MISSING = object()
+
+# Invalidation counters are kept per stripe of keys, so their number stays fixed.
+STAMP_STRIPES = 1024
+
+
+def _sizeof(value):
+    """Rough memory footprint of a cached value, counting one level of dict contents."""
+    size = sys.getsizeof(value)
+    if isinstance(value, dict):
+        size += sum(sys.getsizeof(k) + sys.getsizeof(v) for k, v in value.items())
+    return size
+
+
+class LRUCache:
+    """Thread-safe LRU cache with per-entry TTL and an entry-count and byte bound."""
+
+    def __init__(self, max_entries=10000, ttl=30.0, max_bytes=None):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._stamps = [0] * STAMP_STRIPES
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._entries.get(key, _MISSING)
+            if entry is _MISSING:
+                self.misses += 1
+                return default
+            value, expires, size = entry
+            if expires < time.monotonic():
+                del self._entries[key]
+                self._bytes -= size
+                self.expirations += 1
+                self.misses += 1
+                return default
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def stamp(self, key):
+        """The key's invalidation count; pass it to put() to fill the key from a read started now."""
+        with self._lock:
+            return self._stamps[hash(key) % STAMP_STRIPES]
+
+    def put(self, key, value, stamp=None):
+        """Stores value; with a stamp, only if the key was not popped since that stamp was taken."""
+        size = _sizeof(value) + sys.getsizeof(key)
+        with self._lock:
+            if stamp is not None and stamp != self._stamps[hash(key) % STAMP_STRIPES]:
+                return
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= old[2]
+            self._entries[key] = (value, time.monotonic() + self.ttl, size)
+            self._bytes += size
+            while self._entries and (len(self._entries) > self.max_entries
+                                     or (self.max_bytes and self._bytes > self.max_bytes)):
+                _, (_, _, evicted_size) = self._entries.popitem(last=False)
+                self._bytes -= evicted_size
+                self.evictions += 1
+
+    def pop(self, key):
+        with self._lock:
+            self._stamps[hash(key) % STAMP_STRIPES] += 1
+            entry = self._entries.pop(key, None)
+            if entry is not None:
+                self._bytes -= entry[2]
+                self.invalidations += 1
+                return entry[0]
+        return None
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self):
+        """Returns hit/miss/eviction counters and the current size."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "invalidations": self.invalidations,
+            }
+
+
+class CachedBackend(StorageBackend):
+    """Wraps another StorageBackend with a read-through LRUCache.
+
+    Keys: ('user', user_id) -> UserRow (its balance is not used), ('name', username) -> user_id,
+    ('balance', user_id) -> balance.
+
+    A write drops the balance entry rather than storing its result: two concurrent writes may
+    return in either order. Reads fill the entry with a stamp, so a balance read before a
+    write is never stored after that write dropped the entry.
+    """
+
+    def __init__(self, backend, cache=None):
+        self.backend = backend
+        self.cache = cache if cache is not None else LRUCache()
+
+    def find_user(self, username):
+        user_id = self.cache.get(('name', username))
+        record = self.cache.get(('user', user_id)) if user_id is not None else None
+        if record is None:
+            stamp = self.cache.stamp(('balance', user_id)) if user_id is not None else None
+            user_data = self.backend.find_user(username)
+            if user_data:
+                self.cache.put(('user', user_data.user_id), user_data)
+                self.cache.put(('name', username), user_data.user_id)
+                if user_data.user_id == user_id:
+                    self.cache.put(('balance', user_id), user_data.balance, stamp)
+            return user_data
+        # The balance has its own entry, dropped by our writes.
+        return record._replace(balance=self.get_balance(user_id))
+
+    def get_password(self, user_id):
+        record = self.cache.get(('user', user_id))
+        if record is not None:
+            return record.password
+        return self.backend.get_password(user_id)
+
+    def get_balance(self, user_id):
+        balance = self.cache.get(('balance', user_id))
+        if balance is None:
+            stamp = self.cache.stamp(('balance', user_id))
+            balance = self.backend.get_balance(user_id)
+            if balance is not None:
+                self.cache.put(('balance', user_id), balance, stamp)
+        return balance
+
+    def post(self, user_id, delta, journal=None, daily_limit=None):
+        try:
+            return self.backend.post(user_id, delta, journal, daily_limit)
+        finally:
+            self.cache.pop(('balance', user_id))
+
+    def transfer(self, from_user_id, to_user_id, amount, journal=False):
+        try:
+            return self.backend.transfer(from_user_id, to_user_id, amount, journal)
+        finally:
+            self.cache.pop(('balance', from_user_id))
+            self.cache.pop(('balance', to_user_id))
+
+    def update_password(self, user_id, current_hash, new_hash, journal=None):
+        updated = self.backend.update_password(user_id, current_hash, new_hash, journal)
+        record = self.cache.get(('user', user_id))
+        if record is not None:
+            if updated:
+                self.cache.put(('user', user_id), record._replace(password=new_hash))
+            else:
+                self.cache.pop(('user', user_id))
+        return updated
+
+    def append_journal(self, records):
+        self.backend.append_journal(records)
+
+    def stream_table(self, table, after=None, chunk_size=1000):
+        # A full-table read; passing it through keeps it out of the cache.
+        return self.backend.stream_table(table, after, chunk_size)
+
+    def journal_page(self, user_id, limit, after=None, start=None, end=None, descending=True):
+        return self.backend.journal_page(user_id, limit, after, start, end, descending)
+
+    def keeps_daily_totals(self):
+        return self.backend.keeps_daily_totals()
+
+    def get_daily_totals(self, user_id, day=None):
+        return self.backend.get_daily_totals(user_id, day)
+
+    def rebuild_daily_totals(self):
+        return self.backend.rebuild_daily_totals()
+
+    def add_users(self, users):
+        self.backend.add_users(users)
+
+    def apply_postings(self, postings):
+        try:
+            return self.backend.apply_postings(postings)
+        finally:
+            for user_id in {posting[0] for posting in postings}:
+                self.cache.pop(('balance', user_id))
+
+    def list_users(self, after=0, limit=1000):
+        return self.backend.list_users(after, limit)
+
+    def export_accounts(self, user_ids):
+        return self.backend.export_accounts(user_ids)
+
+    def import_accounts(self, accounts):
+        self.backend.import_accounts(accounts)
+
+    def delete_accounts(self, user_ids):
+        try:
+            self.backend.delete_accounts(user_ids)
+        finally:
+            for user_id in user_ids:
+                self.cache.pop(('user', user_id))
+                self.cache.pop(('balance', user_id))
+
+    def checkpoint_lsn(self, name):
+        return self.backend.checkpoint_lsn(name)
+
+    def apply_checkpoint(self, name, lsn, balances, records):
+        try:
+            return self.backend.apply_checkpoint(name, lsn, balances, records)
+        finally:
+            for user_id in balances:
+                self.cache.pop(('balance', user_id))
+
+    def close(self):
+        self.cache.clear()
+        self.backend.close()
@@ -0,0 +1,149 @@
+# Scripted ATM operations for kiosks and cron probes.
+# മെനു ഇല്ലാതെ ഒരൊറ്റ ഓപ്പറേഷൻ ചെയ്ത് പുറത്തുകടക്കുന്നു. ഡ്രൈവർ (mysql.connector) ആവശ്യമുള്ളപ്പോൾ മാത്രം
+# ഇംപോർട്ട് ചെയ്യുന്നു; --helper കൊടുത്താൽ ഓടിക്കൊണ്ടിരിക്കുന്ന server.py യോട് Unix സോക്കറ്റ് വഴി
+# സംസാരിക്കുന്നതിനാൽ ഓരോ റണ്ണിലും പുതിയ ഡാറ്റാബേസ് ഹാൻഡ്‌ഷേക്ക് വേണ്ട.
+#
+# Usage (the password comes from $ATM_PASSWORD, or is prompted for):
+#   python atm-update.py --user alice --op balance [--sqlite atm.db | --db-socket /run/mysqld/mysqld.sock]
+#   python atm-update.py --user alice --op withdraw --amount 500
+#   python server.py --unix /tmp/atm.sock &     # once, then:
+#   python atm-update.py --user alice --op deposit --amount 250 --helper /tmp/atm.sock
+# Add --timing to print where the time went on stderr.
+# Prints "OK <balance>"; errors go to stderr as "ERR <message>" with exit status 1 (3: database unreachable).
+import os
+import sys
+import time
+from types import SimpleNamespace
+
+OPERATIONS = ("balance", "deposit", "withdraw")
+HELPER_OPTIONS = ("--user", "--op", "--amount", "--helper")
+
+
+def _parser():
+    import argparse
+
+    import passwords
+    import throttle
+    from storage import add_arguments
+
+    parser = argparse.ArgumentParser(description="Run one ATM operation without the menu")
+    parser.add_argument("--user", required=True)
+    parser.add_argument("--op", choices=OPERATIONS, required=True)
+    parser.add_argument("--amount", help="for deposit and withdraw")
+    parser.add_argument("--helper", metavar="PATH",
+                        help="send the operation to `server.py --unix PATH` if it is running")
+    parser.add_argument("--timing", action="store_true", help="print start-up and operation times on stderr")
+    add_arguments(parser)
+    passwords.add_arguments(parser)
+    throttle.add_arguments(parser)
+    return parser
+
+
+def _helper_args(argv):
+    """Parses a complete --helper command line without argparse; None for anything else.
+
+    argparse (with re) and the storage options' modules are most of the start-up time,
+    and a run through the helper needs neither.
+    """
+    args = SimpleNamespace(user=None, op=None, amount=None, helper=None, timing=False)
+    items = iter(argv)
+    for item in items:
+        if item == "--timing":
+            args.timing = True
+        elif item in HELPER_OPTIONS:
+            setattr(args, item[2:], next(items, None))
+        else:
+            return None
+    if not (args.helper and args.user) or args.op not in OPERATIONS or (args.op != "balance" and not args.amount):
+        return None
+    return args
+
+
+def ask_helper(path, lines):
+    """Sends protocol lines to server.py on a Unix socket and returns its reply lines."""
+    import socket
+
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.connect(path)
+        sock.sendall("".join(line + "\r\n" for line in lines).encode("utf-8"))
+        with sock.makefile("r", encoding="utf-8") as replies:
+            return [replies.readline().rstrip("\r\n") for _ in lines]
+
+
+def run_helper(args, password):
+    """Runs the operation through the helper; returns (status, message)."""
+    command = args.op.upper() if args.op == "balance" else f"{args.op.upper()} {args.amount}"
+    login, reply, _ = ask_helper(args.helper, [f"LOGIN {args.user} {password}", command, "QUIT"])
+    for line in (login, reply):
+        if not line.startswith("OK"):
+            return 1, line
+    return 0, reply
+
+
+def run_direct(args, password, journal):
+    """Runs the operation against the database; returns (status, message)."""
+    import passwords
+    import throttle
+    from pool import connection_errors
+    from service import AccountService, ATMError
+    from storage import open_backend
+
+    backend = open_backend(args)
+    hasher = passwords.open_hasher(args)
+    limiter = throttle.open_throttle(args)
+    try:
+        service = AccountService(backend, journal=journal, passwords=hasher, throttle=limiter)
+        session = service.login(args.user, password)
+        if args.op == "balance":
+            result = service.balance(session.user_id)
+        elif args.op == "deposit":
+            result = service.deposit(session.user_id, args.amount)
+        else:
+            result = service.withdraw(session.user_id, args.amount)
+        return 0, f"OK {result.balance:.2f}"
+    except ATMError as err:
+        return 1, f"ERR {err}"
+    except connection_errors() as err:
+        return 3, f"ERR Database connection failed: {err}"
+    finally:
+        if limiter is not None:
+            limiter.close()
+        hasher.close()
+        backend.close()
+
+
+def main(argv=None, journal=True, started=None):
+    """Runs one operation from the command line and returns the exit status."""
+    started = time.perf_counter() if started is None else started
+    argv = sys.argv[1:] if argv is None else argv
+    args = _helper_args(argv)
+    if args is None:
+        parser = _parser()
+        args = parser.parse_args(argv)
+        if args.op != "balance" and args.amount is None:
+            parser.error(f"--op {args.op} needs --amount")
+
+    password = os.environ.get("ATM_PASSWORD")
+    if password is None:
+        import getpass
+        password = getpass.getpass()
+
+    ready = time.perf_counter()
+    mode = "direct"
+    status = None
+    if args.helper:
+        try:
+            status, message = run_helper(args, password)
+            mode = "helper"
+        except (FileNotFoundError, ConnectionRefusedError):
+            # No helper running: fall back to connecting ourselves.
+            args = _parser().parse_args(argv)
+    if status is None:
+        status, message = run_direct(args, password, journal)
+    done = time.perf_counter()
+
+    print(message, file=sys.stdout if status == 0 else sys.stderr)
+    if args.timing:
+        print(f"start-up {(ready - started) * 1000:.1f} ms, operation ({mode}) {(done - ready) * 1000:.1f} ms, "
+              f"total {(done - started) * 1000:.1f} ms", file=sys.stderr)
+    return status
@@ -0,0 +1,221 @@
+# Streaming export of the users and transactions tables.
+# db2.py ലെ പോലെ SELECT * ചെയ്ത് fetchall() ഉപയോഗിച്ചാൽ മുഴുവൻ ടേബിളും മെമ്മറിയിൽ കയറും. ഇവിടെ
+# server-side (unbuffered) cursor ൽ നിന്ന് fetchmany ചങ്കുകളായി വായിച്ച്, ജനറേറ്റർ പൈപ്പ്‌ലൈൻ വഴി
+# ഓരോ ചങ്കും എൻകോഡ് ചെയ്ത് (കംപ്രസ് ചെയ്ത്) എഴുതുന്നു. അതിനാൽ മെമ്മറി ഉപയോഗം ഒരു ചങ്കിന്റേത് മാത്രം.
+#
+# Usage:
+#   python export.py users users.csv [--sqlite atm.db]
+#   python export.py transactions transactions.jsonl.gz --format jsonl --compress gzip --chunk-size 10000
+#   python export.py transactions transactions.jsonl.gz --format jsonl --compress gzip --resume
+#   python export.py transactions transactions_parquet --format parquet    # a directory of parts; needs pyarrow
+#
+# After every chunk the last primary key written is saved next to the output (<output>.pos, or
+# _position.json inside a parquet directory). --resume continues from there, after an interrupted
+# run or later on to append only the rows added since.
+import argparse
+import bz2
+import csv
+import gzip
+import io
+import json
+import lzma
+import os
+import time
+from datetime import datetime
+
+from money import Money
+
+FORMATS = ("csv", "jsonl", "parquet")
+COMPRESSORS = {"none": None, "gzip": gzip.compress, "bz2": bz2.compress, "xz": lzma.compress}
+
+
+def _value(value):
+    """A column value for CSV/JSON: Money and timestamps as text, everything else unchanged."""
+    if isinstance(value, Money):
+        return str(value)
+    if isinstance(value, datetime):
+        return value.isoformat(sep=" ")
+    return value
+
+
+def encode_csv(rows, header=None):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator="\n")
+    if header:
+        writer.writerow(header)
+    writer.writerows([_value(value) for value in row] for row in rows)
+    return buffer.getvalue()
+
+
+def encode_jsonl(rows):
+    return "".join(json.dumps({field: _value(value) for field, value in zip(row._fields, row)},
+                              ensure_ascii=False) + "\n" for row in rows)
+
+
+def _save_position(path, position):
+    # Written to a temporary file and renamed, so a crash leaves the old position or the new one.
+    with open(path + ".tmp", "w", encoding="utf-8") as f:
+        json.dump(position, f)
+    os.replace(path + ".tmp", path)
+
+
+def _load_position(path, resume):
+    if resume and os.path.exists(path):
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    return None
+
+
+class TextWriter:
+    """CSV or JSONL file written chunk by chunk; each chunk is compressed on its own.
+
+    gzip, bz2 and xz readers all accept concatenated streams, so the file stays one valid
+    archive and can be cut back to the end of any recorded chunk.
+    """
+
+    def __init__(self, path, fields, fmt="csv", compress="none", resume=False):
+        self.fields = fields
+        self.format = fmt
+        self.compress = COMPRESSORS[compress]
+        self.position_path = path + ".pos"
+        position = _load_position(self.position_path, resume)
+        self.after, size = (position["after"], position["bytes"]) if position else (None, 0)
+        self.file = open(path, "r+b" if size else "wb")
+        # Bytes past the recorded size belong to a chunk whose position was never saved; it is written again.
+        self.file.truncate(size)
+        self.file.seek(size)
+
+    def write(self, rows):
+        if self.format == "csv":
+            text = encode_csv(rows, self.fields if self.file.tell() == 0 else None)
+        else:
+            text = encode_jsonl(rows)
+        data = text.encode("utf-8")
+        if self.compress:
+            data = self.compress(data)
+        self.file.write(data)
+        self.file.flush()
+        os.fsync(self.file.fileno())
+        self.after = rows[-1][0]
+        _save_position(self.position_path, {"after": self.after, "bytes": self.file.tell()})
+
+    def close(self):
+        self.file.close()
+
+
+class ParquetWriter:
+    """A directory of Parquet part files, one row group per chunk; needs pyarrow.
+
+    A Parquet file cannot be appended to, so every run (and every `part_rows` rows)
+    starts a new part. The position is saved only when a part is closed.
+    """
+
+    def __init__(self, path, table, compress="none", resume=False, part_rows=1000000):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        self.pa, self.pq = pa, pq
+        amount = pa.decimal128(12, 2)
+        self.schema = pa.schema(
+            [("user_id", pa.int64()), ("username", pa.string()), ("balance", amount)]
+            if table == "users" else
+            [("transaction_id", pa.int64()), ("user_id", pa.int64()), ("transaction_type", pa.string()),
+             ("amount", amount), ("timestamp", pa.timestamp("s"))])
+        self.path = path
+        self.compression = compress
+        self.part_rows = part_rows
+        os.makedirs(path, exist_ok=True)
+        self.position_path = os.path.join(path, "_position.json")
+        position = _load_position(self.position_path, resume)
+        self.after, self.parts = (position["after"], position["parts"]) if position else (None, 0)
+        self.writer = None
+        self.part_size = 0
+
+    def write(self, rows):
+        if self.writer is None:
+            # Overwrites a part left unfinished by an interrupted run.
+            self.writer = self.pq.ParquetWriter(os.path.join(self.path, f"part-{self.parts + 1:05d}.parquet"),
+                                                self.schema, compression=self.compression)
+        columns = [[value.to_decimal() if isinstance(value, Money) else value for value in column]
+                   for column in zip(*rows)]
+        self.writer.write_table(self.pa.Table.from_arrays(columns, schema=self.schema))
+        self.after = rows[-1][0]
+        self.part_size += len(rows)
+        if self.part_size >= self.part_rows:
+            self._close_part()
+
+    def _close_part(self):
+        self.writer.close()
+        self.writer = None
+        self.part_size = 0
+        self.parts += 1
+        _save_position(self.position_path, {"after": self.after, "parts": self.parts})
+
+    def close(self):
+        if self.writer is not None:
+            self._close_part()
+
+
+def export_table(backend, table, writer, chunk_size=10000, progress=None):
+    """Streams `table` from the backend into `writer`, starting after writer.after.
+
+    Returns a dict with the row count, elapsed seconds, rows per second and the last key written.
+    """
+    start = time.perf_counter()
+    rows = 0
+    try:
+        for chunk in backend.stream_table(table, writer.after, chunk_size):
+            writer.write(chunk)
+            rows += len(chunk)
+            if progress:
+                progress(rows, time.perf_counter() - start)
+    finally:
+        writer.close()
+    elapsed = time.perf_counter() - start
+    return {
+        "rows": rows,
+        "elapsed": elapsed,
+        "rows_per_second": rows / elapsed if elapsed else 0.0,
+        "last_key": writer.after,
+    }
+
+
+def main():
+    from storage import STREAM_TABLES, add_arguments, open_backend
+
+    parser = argparse.ArgumentParser(description="Export users or transactions in constant memory")
+    parser.add_argument("table", choices=sorted(STREAM_TABLES))
+    parser.add_argument("output", help="output file (a directory for --format parquet)")
+    parser.add_argument("--format", choices=FORMATS, default="csv")
+    parser.add_argument("--compress", choices=sorted(COMPRESSORS), default="none",
+                        help="parquet supports none and gzip")
+    parser.add_argument("--chunk-size", type=int, default=10000, help="rows per fetchmany() and per write")
+    parser.add_argument("--part-rows", type=int, default=1000000, help="rows per parquet part file")
+    parser.add_argument("--resume", action="store_true", help="continue after the last key already exported")
+    add_arguments(parser)
+    args = parser.parse_args()
+
+    if args.format == "parquet":
+        if args.compress not in ("none", "gzip"):
+            parser.error("parquet supports --compress none or gzip")
+        try:
+            writer = ParquetWriter(args.output, args.table, args.compress, args.resume, args.part_rows)
+        except ImportError:
+            parser.error("--format parquet needs pyarrow (pip install pyarrow)")
+    else:
+        writer = TextWriter(args.output, STREAM_TABLES[args.table]._fields, args.format, args.compress, args.resume)
+    if writer.after is not None:
+        print(f"Resuming after key {writer.after}.")
+
+    backend = open_backend(args)
+    try:
+        summary = export_table(backend, args.table, writer, args.chunk_size,
+                               progress=lambda rows, elapsed: print(f"{rows} rows, {rows / elapsed:.0f} rows/s"))
+    finally:
+        backend.close()
+    print(f"✅ {summary['rows']} {args.table} rows exported to {args.output} "
+          f"({summary['rows_per_second']:.0f} rows/s, {summary['elapsed']:.2f}s, last key {summary['last_key']}).")
+
+
+if __name__ == "__main__":
+    main()
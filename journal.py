@@ -0,0 +1,152 @@
+# Group-commit journal writer for the transactions table.
+# ഓരോ ട്രാൻസാക്ഷനും വെവ്വേറെ INSERT ഉം commit ഉം ചെയ്യുന്നതിനു പകരം, റെക്കോർഡുകൾ ബഫറിൽ
+# ശേഖരിച്ച് ഒരു executemany ഉം ഒരു commit ഉം ഉപയോഗിച്ച് ഒരുമിച്ച് എഴുതുന്നു.
+import threading
+import time
+
+SYNC = "sync"      # every record is inserted and committed before append() returns
+GROUP = "group"    # records are batched; append() waits until its batch is committed
+ASYNC = "async"    # records are batched; append() returns immediately
+
+
+class _Ticket:
+    """Lets a GROUP-mode caller wait for the flush that contains its record."""
+    __slots__ = ("done", "error")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.error = None
+
+
+class JournalWriter:
+    def __init__(self, backend, mode=GROUP, max_batch=100, max_delay=0.005):
+        if mode not in (SYNC, GROUP, ASYNC):
+            raise ValueError(f"Unknown journal mode: {mode}")
+        # Any storage.StorageBackend; its append_journal() writes a batch in one commit.
+        self.backend = backend
+        self.mode = mode
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self._buffer = []
+        self._oldest = None
+        self._in_flight = 0
+        self._closed = False
+        self._cond = threading.Condition()
+        self._stats_lock = threading.Lock()
+        self.flushes = 0
+        self.rows = 0
+        self.largest_batch = 0
+        self.flush_time = 0.0
+        self.slowest_flush = 0.0
+        self.failed_rows = 0
+        self.last_error = None
+        self._thread = None
+        if mode != SYNC:
+            self._thread = threading.Thread(target=self._run, name="journal-writer", daemon=True)
+            self._thread.start()
+
+    def append(self, user_id, transaction_type, amount=None):
+        """Queues one transactions row according to the durability mode."""
+        record = (user_id, transaction_type, amount)
+        if self.mode == SYNC:
+            self._write([record])
+            return
+        ticket = _Ticket() if self.mode == GROUP else None
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("The journal writer is closed.")
+            if not self._buffer:
+                self._oldest = time.monotonic()
+            self._buffer.append((record, ticket))
+            if len(self._buffer) == 1 or len(self._buffer) >= self.max_batch:
+                self._cond.notify_all()
+        if ticket:
+            ticket.done.wait()
+            if ticket.error:
+                raise ticket.error
+
+    def _take_batch(self):
+        """Waits for a size or time trigger and removes one batch from the buffer."""
+        with self._cond:
+            while not self._buffer and not self._closed:
+                self._cond.wait()
+            while self._buffer and not self._closed and len(self._buffer) < self.max_batch:
+                remaining = self.max_delay - (time.monotonic() - self._oldest)
+                if remaining <= 0:
+                    break
+                self._cond.wait(remaining)
+            batch = self._buffer[:self.max_batch]
+            del self._buffer[:self.max_batch]
+            self._in_flight += len(batch)
+            self._oldest = time.monotonic() if self._buffer else None
+            self._cond.notify_all()
+            return batch
+
+    def _run(self):
+        while True:
+            batch = self._take_batch()
+            if not batch:
+                if self._closed:
+                    return
+                continue
+            error = None
+            try:
+                self._write([record for record, _ in batch])
+            except Exception as err:
+                error = err
+            for _, ticket in batch:
+                if ticket:
+                    ticket.error = error
+                    ticket.done.set()
+            with self._cond:
+                self._in_flight -= len(batch)
+                self._cond.notify_all()
+
+    def _write(self, records):
+        """Inserts the records with one executemany and one commit."""
+        start = time.monotonic()
+        try:
+            self.backend.append_journal(records)
+        except Exception as err:
+            with self._stats_lock:
+                self.failed_rows += len(records)
+                self.last_error = err
+            raise
+        elapsed = time.monotonic() - start
+        with self._stats_lock:
+            self.flushes += 1
+            self.rows += len(records)
+            self.largest_batch = max(self.largest_batch, len(records))
+            self.flush_time += elapsed
+            self.slowest_flush = max(self.slowest_flush, elapsed)
+
+    def flush(self):
+        """Blocks until everything appended so far has been written (or has failed)."""
+        with self._cond:
+            while self._buffer or self._in_flight:
+                self._oldest = time.monotonic() - self.max_delay
+                self._cond.notify_all()
+                self._cond.wait()
+
+    def close(self):
+        """Writes any buffered records and stops the background thread."""
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        if self._thread:
+            self._thread.join()
+
+    def stats(self):
+        """Returns flush counts, batch sizes and flush latency."""
+        with self._stats_lock:
+            return {
+                "mode": self.mode,
+                "pending": len(self._buffer),
+                "flushes": self.flushes,
+                "rows": self.rows,
+                "average_batch": self.rows / self.flushes if self.flushes else 0.0,
+                "largest_batch": self.largest_batch,
+                "average_flush_time": self.flush_time / self.flushes if self.flushes else 0.0,
+                "slowest_flush": self.slowest_flush,
+                "failed_rows": self.failed_rows,
+            }
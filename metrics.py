@@ -0,0 +1,252 @@
+# In-process instrumentation: operation timing, query counts and a slow-query log.
+# ഓരോ cursor.execute/commit ഉം ഓരോ ഓപ്പറേഷനും എത്ര സമയം എടുത്തു, എത്ര round trip, എത്ര വരികൾ
+# എന്നിവ ഒരു രജിസ്ട്രിയിൽ ശേഖരിക്കുന്നു. Prometheus text ആയോ JSON ആയോ എക്സ്പോർട്ട് ചെയ്യാം.
+# ഓഫ് ആയിരിക്കുമ്പോൾ ഒരു if പരിശോധന മാത്രമേ ചെലവുള്ളൂ.
+import bisect
+import functools
+import json
+import threading
+import time
+from collections import deque
+
+BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+
+class Histogram:
+    """Cumulative-bucket latency histogram in seconds."""
+    __slots__ = ("counts", "count", "total")
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS) + 1)
+        self.count = 0
+        self.total = 0.0
+
+    def observe(self, seconds):
+        self.counts[bisect.bisect_left(BUCKETS, seconds)] += 1
+        self.count += 1
+        self.total += seconds
+
+
+class Registry:
+    def __init__(self):
+        self.enabled = False
+        self.slow_query_threshold = 0.1
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.operations = {}     # operation -> Histogram
+            self.queries = {}        # statement verb -> Histogram
+            self.counters = {}       # (name, operation) -> int
+            self.slow_queries = deque(maxlen=100)
+
+    def enable(self, slow_query_threshold=None):
+        if slow_query_threshold is not None:
+            self.slow_query_threshold = slow_query_threshold
+        self.enabled = True
+
+    def disable(self):
+        self.enabled = False
+
+    @property
+    def current_operation(self):
+        return getattr(self._local, "operation", None) or "other"
+
+    def increment(self, name, operation=None, amount=1):
+        key = (name, operation or self.current_operation)
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + amount
+
+    def observe_operation(self, operation, seconds, failed=False):
+        with self._lock:
+            histogram = self.operations.get(operation)
+            if histogram is None:
+                histogram = self.operations[operation] = Histogram()
+            histogram.observe(seconds)
+            key = ("operations", operation)
+            self.counters[key] = self.counters.get(key, 0) + 1
+            if failed:
+                key = ("errors", operation)
+                self.counters[key] = self.counters.get(key, 0) + 1
+
+    def observe_query(self, sql, seconds, rows=None):
+        operation = self.current_operation
+        verb = sql.split(None, 1)[0].upper() if sql else "UNKNOWN"
+        with self._lock:
+            histogram = self.queries.get(verb)
+            if histogram is None:
+                histogram = self.queries[verb] = Histogram()
+            histogram.observe(seconds)
+            key = ("round_trips", operation)
+            self.counters[key] = self.counters.get(key, 0) + 1
+            if seconds >= self.slow_query_threshold:
+                self.slow_queries.append({
+                    "sql": sql,
+                    "seconds": seconds,
+                    "operation": operation,
+                    "at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                })
+
+    def operation(self, name):
+        """Decorator that times a service method and attributes its queries to `name`."""
+        def decorator(fn):
+            @functools.wraps(fn)
+            def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return fn(*args, **kwargs)
+                outer = getattr(self._local, "operation", None)
+                self._local.operation = outer or name
+                start = time.perf_counter()
+                failed = True
+                try:
+                    result = fn(*args, **kwargs)
+                    failed = False
+                    return result
+                finally:
+                    if outer is None:
+                        self._local.operation = None
+                        self.observe_operation(name, time.perf_counter() - start, failed)
+            return wrapper
+        return decorator
+
+    def snapshot(self):
+        """Returns every metric as plain dicts and lists."""
+        def histogram(h):
+            return {"count": h.count, "sum": h.total, "mean": h.total / h.count if h.count else 0.0,
+                    "buckets": dict(zip([str(b) for b in BUCKETS] + ["+Inf"], h.counts))}
+
+        with self._lock:
+            operations = {}
+            for name, h in self.operations.items():
+                entry = histogram(h)
+                for counter in ("errors", "round_trips", "rows"):
+                    entry[counter] = self.counters.get((counter, name), 0)
+                entry["round_trips_per_op"] = entry["round_trips"] / h.count if h.count else 0.0
+                operations[name] = entry
+            return {
+                "operations": operations,
+                "queries": {verb: histogram(h) for verb, h in self.queries.items()},
+                "counters": {f"{name}:{operation}": value for (name, operation), value in self.counters.items()},
+                "slow_queries": list(self.slow_queries),
+            }
+
+    def to_json(self):
+        return json.dumps(self.snapshot(), indent=2)
+
+    def to_prometheus(self):
+        """Renders the registry in the Prometheus text exposition format."""
+        lines = []
+
+        def histogram(metric, label, name, h):
+            cumulative = 0
+            for bound, count in zip([str(b) for b in BUCKETS] + ["+Inf"], h.counts):
+                cumulative += count
+                lines.append(f'{metric}_bucket{{{label}="{name}",le="{bound}"}} {cumulative}')
+            lines.append(f'{metric}_sum{{{label}="{name}"}} {h.total}')
+            lines.append(f'{metric}_count{{{label}="{name}"}} {h.count}')
+
+        with self._lock:
+            lines.append("# TYPE atm_operation_seconds histogram")
+            for name, h in sorted(self.operations.items()):
+                histogram("atm_operation_seconds", "operation", name, h)
+            lines.append("# TYPE atm_query_seconds histogram")
+            for verb, h in sorted(self.queries.items()):
+                histogram("atm_query_seconds", "statement", verb, h)
+            for (name, operation), value in sorted(self.counters.items()):
+                lines.append(f'atm_{name}_total{{operation="{operation}"}} {value}')
+            lines.append(f"atm_slow_queries {len(self.slow_queries)}")
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+operation = REGISTRY.operation
+
+
+class InstrumentedCursor:
+    """Cursor proxy that times execute/executemany and counts fetched rows."""
+
+    def __init__(self, cursor, registry):
+        self._cursor = cursor
+        self._registry = registry
+
+    def execute(self, sql, *args, **kwargs):
+        if not self._registry.enabled:
+            return self._cursor.execute(sql, *args, **kwargs)
+        start = time.perf_counter()
+        try:
+            result = self._cursor.execute(sql, *args, **kwargs)
+        finally:
+            self._registry.observe_query(sql, time.perf_counter() - start)
+        # sqlite3 cursors return themselves from execute(); keep the proxy in the chain.
+        return self if result is self._cursor else result
+
+    def executemany(self, sql, *args, **kwargs):
+        if not self._registry.enabled:
+            return self._cursor.executemany(sql, *args, **kwargs)
+        start = time.perf_counter()
+        try:
+            result = self._cursor.executemany(sql, *args, **kwargs)
+        finally:
+            self._registry.observe_query(sql, time.perf_counter() - start)
+        return self if result is self._cursor else result
+
+    def _rows(self, count):
+        if self._registry.enabled and count:
+            self._registry.increment("rows", amount=count)
+
+    def fetchone(self):
+        row = self._cursor.fetchone()
+        self._rows(row is not None)
+        return row
+
+    def fetchmany(self, *args, **kwargs):
+        rows = self._cursor.fetchmany(*args, **kwargs)
+        self._rows(len(rows))
+        return rows
+
+    def fetchall(self):
+        rows = self._cursor.fetchall()
+        self._rows(len(rows))
+        return rows
+
+    def __iter__(self):
+        for row in self._cursor:
+            self._rows(1)
+            yield row
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+
+class InstrumentedConnection:
+    """Connection proxy whose cursors and commits are recorded in the registry."""
+
+    def __init__(self, connection, registry=REGISTRY):
+        self._connection = connection
+        self._registry = registry
+
+    def cursor(self, *args, **kwargs):
+        return InstrumentedCursor(self._connection.cursor(*args, **kwargs), self._registry)
+
+    def execute(self, sql, *args, **kwargs):
+        # sqlite3 shortcut: Connection.execute() opens a cursor implicitly.
+        return self.cursor().execute(sql, *args, **kwargs)
+
+    def commit(self):
+        if not self._registry.enabled:
+            return self._connection.commit()
+        start = time.perf_counter()
+        try:
+            return self._connection.commit()
+        finally:
+            self._registry.observe_query("COMMIT", time.perf_counter() - start)
+
+    def __getattr__(self, name):
+        return getattr(self._connection, name)
+
+
+def instrument(connection, registry=REGISTRY):
+    """Wraps a DB-API connection so its queries are recorded while the registry is enabled."""
+    return InstrumentedConnection(connection, registry)
@@ -0,0 +1,125 @@
+# Exact money amounts as integer paise.
+# float(input(...)) ൽ നിന്ന് വരുന്ന 0.1 + 0.2 പോലുള്ള റൗണ്ടിങ് പിഴവുകൾ ഒഴിവാക്കാൻ, ഓരോ തുകയും
+# പൈസയിൽ ഒരു int ആയി സൂക്ഷിക്കുന്നു. ഇൻപുട്ട് പാഴ്‌സ് ചെയ്യുമ്പോഴും SQL ലേക്ക് അയക്കുമ്പോഴും (DECIMAL)
+# മാത്രമേ മാറ്റം (conversion) നടക്കുന്നുള്ളൂ; ഇടയിലുള്ള കണക്കുകൂട്ടലുകൾ എല്ലാം int ആണ്.
+#
+# Plain ints mix in as whole rupees: Money.of(5) == Money(500), and `amount <= 0` works.
+from decimal import ROUND_HALF_UP, Decimal
+
+_SCALE = (100, 10, 1)
+
+
+class Money:
+    """An amount of rupees held as integer paise."""
+    __slots__ = ("paise",)
+
+    def __init__(self, paise=0):
+        self.paise = paise
+
+    @classmethod
+    def parse(cls, text):
+        """Parses user input such as '250', '99.5' or '-0.75'; more than two decimals is an error."""
+        rupees, _, paise = text.strip().partition(".")
+        negative = rupees.startswith("-")
+        if negative or rupees.startswith("+"):
+            rupees = rupees[1:]
+        digits = rupees + paise
+        if len(paise) > 2 or not digits.isdigit() or not digits.isascii():
+            raise ValueError(f"Invalid amount: {text!r}")
+        # '12.5' -> 125 * 10, '12' -> 12 * 100: one int() call, no Decimal.
+        value = int(digits) * _SCALE[len(paise)]
+        return cls(-value if negative else value)
+
+    @classmethod
+    def from_decimal(cls, value):
+        """Converts a DECIMAL column value, rounding half up to the paisa."""
+        return cls(int(value.scaleb(2).to_integral_value(ROUND_HALF_UP)))
+
+    @classmethod
+    def of(cls, value):
+        """Converts Money, int rupees, Decimal, str or (at the edges only) float."""
+        if isinstance(value, Money):
+            return value
+        if isinstance(value, int):
+            return cls(value * 100)
+        if isinstance(value, Decimal):
+            return cls.from_decimal(value)
+        if isinstance(value, float):
+            return cls.from_decimal(Decimal(repr(value)))
+        return cls.parse(str(value))
+
+    def to_decimal(self):
+        """The amount as a two-place Decimal, for DECIMAL(10,2) SQL parameters."""
+        return Decimal(self.paise).scaleb(-2)
+
+    def __add__(self, other):
+        if isinstance(other, Money):
+            return Money(self.paise + other.paise)
+        if isinstance(other, int):
+            return Money(self.paise + other * 100)
+        return NotImplemented
+
+    __radd__ = __add__
+
+    def __sub__(self, other):
+        if isinstance(other, Money):
+            return Money(self.paise - other.paise)
+        if isinstance(other, int):
+            return Money(self.paise - other * 100)
+        return NotImplemented
+
+    def __neg__(self):
+        return Money(-self.paise)
+
+    def __abs__(self):
+        return Money(abs(self.paise))
+
+    def _compare(self, other):
+        if isinstance(other, Money):
+            return other.paise
+        if isinstance(other, int):
+            return other * 100
+        return None
+
+    def __eq__(self, other):
+        paise = self._compare(other)
+        return NotImplemented if paise is None else self.paise == paise
+
+    def __lt__(self, other):
+        paise = self._compare(other)
+        return NotImplemented if paise is None else self.paise < paise
+
+    def __le__(self, other):
+        paise = self._compare(other)
+        return NotImplemented if paise is None else self.paise <= paise
+
+    def __gt__(self, other):
+        paise = self._compare(other)
+        return NotImplemented if paise is None else self.paise > paise
+
+    def __ge__(self, other):
+        paise = self._compare(other)
+        return NotImplemented if paise is None else self.paise >= paise
+
+    def __hash__(self):
+        # Whole rupees compare equal to the int, so they must hash like it too.
+        rupees, paise = divmod(self.paise, 100)
+        return hash(rupees) if not paise else hash((self.paise,))
+
+    def __bool__(self):
+        return self.paise != 0
+
+    def __str__(self):
+        sign = "-" if self.paise < 0 else ""
+        rupees, paise = divmod(abs(self.paise), 100)
+        return f"{sign}{rupees}.{paise:02d}"
+
+    def __repr__(self):
+        return f"Money('{self}')"
+
+    def __format__(self, spec):
+        # f"₹{amount:.2f}" in the menus; only used when printing.
+        return format(self.to_decimal(), spec) if spec else str(self)
+
+
+ZERO = Money(0)
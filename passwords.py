@@ -0,0 +1,133 @@
+# Salted, slow password hashes and an off-thread verifier.
+# പാസ്‌വേഡ് SQL WHERE ൽ അയക്കുന്നതിനു പകരം, ഉപ്പ് (salt) ചേർത്ത PBKDF2/scrypt ഹാഷ് ആയി സൂക്ഷിക്കുന്നു.
+# ഹാഷ് കണക്കാക്കൽ CPU ജോലിയായതിനാൽ PasswordVerifier അത് ഒരു process pool ൽ ഓടിക്കുന്നു; അങ്ങനെ
+# ഒരു സെഷന്റെ ലോഗിൻ മറ്റ് സെഷനുകളെ തടയില്ല. കോസ്റ്റ് മാറ്റിയാൽ അടുത്ത ലോഗിനിൽ ഹാഷ് പുതുക്കുന്നു.
+#
+# Stored format: pbkdf2_sha256$<iterations>$<salt>$<hash>  or  scrypt$<n>$<r>$<p>$<salt>$<hash>
+# Anything else is a legacy plaintext password; it still verifies and is rehashed on the next login.
+import base64
+import hashlib
+import hmac
+import os
+
+PBKDF2 = "pbkdf2_sha256"
+SCRYPT = "scrypt"
+DEFAULT_ITERATIONS = 600000
+DEFAULT_SCRYPT_N = 2 ** 14
+
+
+def _b64encode(data):
+    return base64.b64encode(data).decode("ascii").rstrip("=")
+
+
+def _b64decode(text):
+    return base64.b64decode(text + "=" * (-len(text) % 4))
+
+
+def _derive(algorithm, password, salt, params):
+    password = password.encode("utf-8")
+    if algorithm == PBKDF2:
+        return hashlib.pbkdf2_hmac("sha256", password, salt, params[0])
+    n, r, p = params
+    return hashlib.scrypt(password, salt=salt, n=n, r=r, p=p, maxmem=256 * r * n + 2 ** 20, dklen=32)
+
+
+def _parse(encoded):
+    """Returns (algorithm, params, salt, digest), or None for a legacy plaintext password."""
+    parts = encoded.split("$")
+    try:
+        if parts[0] == PBKDF2 and len(parts) == 4:
+            return PBKDF2, (int(parts[1]),), _b64decode(parts[2]), _b64decode(parts[3])
+        if parts[0] == SCRYPT and len(parts) == 6:
+            return SCRYPT, (int(parts[1]), int(parts[2]), int(parts[3])), _b64decode(parts[4]), _b64decode(parts[5])
+    except ValueError:
+        pass
+    return None
+
+
+def verify_password(password, encoded):
+    """True if `password` matches the stored hash (or legacy plaintext) `encoded`."""
+    if not encoded:
+        return False
+    parsed = _parse(encoded)
+    if parsed is None:
+        return hmac.compare_digest(password.encode("utf-8"), encoded.encode("utf-8"))
+    algorithm, params, salt, digest = parsed
+    return hmac.compare_digest(_derive(algorithm, password, salt, params), digest)
+
+
+class PasswordHasher:
+    """Hashes and verifies passwords in the calling thread at a configurable cost."""
+
+    def __init__(self, algorithm=PBKDF2, iterations=DEFAULT_ITERATIONS, n=DEFAULT_SCRYPT_N, r=8, p=1):
+        if algorithm not in (PBKDF2, SCRYPT):
+            raise ValueError(f"Unknown password hash algorithm: {algorithm}")
+        self.algorithm = algorithm
+        self.params = (iterations,) if algorithm == PBKDF2 else (n, r, p)
+
+    def hash(self, password):
+        salt = os.urandom(16)
+        digest = _derive(self.algorithm, password, salt, self.params)
+        return "$".join([self.algorithm] + [str(v) for v in self.params] + [_b64encode(salt), _b64encode(digest)])
+
+    def verify(self, password, encoded):
+        return verify_password(password, encoded)
+
+    def needs_rehash(self, encoded):
+        """True if `encoded` is plaintext or was hashed with another algorithm or cost."""
+        parsed = _parse(encoded or "")
+        return parsed is None or parsed[0] != self.algorithm or parsed[1] != self.params
+
+    def close(self):
+        pass
+
+
+class PasswordVerifier:
+    """Runs a PasswordHasher's hash and verify calls in worker processes.
+
+    Session threads block only on a future while the work runs on another core, so
+    logins on N cores proceed in parallel instead of queueing on one interpreter.
+    """
+
+    def __init__(self, hasher=None, workers=None):
+        # Imported here: multiprocessing is a large share of the scripted ATM's start-up time.
+        import multiprocessing
+        from concurrent.futures import ProcessPoolExecutor
+
+        self.hasher = hasher if hasher is not None else PasswordHasher()
+        self.workers = workers or os.cpu_count() or 1
+        # spawn, not fork: the server and ATM sessions are already multi-threaded.
+        self._executor = ProcessPoolExecutor(self.workers, mp_context=multiprocessing.get_context("spawn"))
+        # Start every worker now rather than on the first logins.
+        for future in [self._executor.submit(os.getpid) for _ in range(self.workers)]:
+            future.result()
+
+    def hash(self, password):
+        return self._executor.submit(self.hasher.hash, password).result()
+
+    def verify(self, password, encoded):
+        return self._executor.submit(verify_password, password, encoded).result()
+
+    def needs_rehash(self, encoded):
+        # Only parses the stored string; not worth a trip to a worker.
+        return self.hasher.needs_rehash(encoded)
+
+    def close(self):
+        self._executor.shutdown()
+
+
+def add_arguments(parser):
+    """Adds the password hashing options shared by the command-line tools."""
+    parser.add_argument("--hash-algorithm", choices=(PBKDF2, SCRYPT), default=PBKDF2)
+    parser.add_argument("--hash-iterations", type=int, default=DEFAULT_ITERATIONS, help="PBKDF2 iterations")
+    parser.add_argument("--hash-n", type=int, default=DEFAULT_SCRYPT_N, help="scrypt CPU/memory cost")
+    parser.add_argument("--hash-workers", type=int, default=0,
+                        help="verify passwords in this many worker processes (0 hashes in the session thread)")
+
+
+def open_hasher(args):
+    """Creates the hasher selected by the options from add_arguments()."""
+    hasher = PasswordHasher(args.hash_algorithm, iterations=args.hash_iterations, n=args.hash_n)
+    if args.hash_workers:
+        return PasswordVerifier(hasher, args.hash_workers)
+    return hasher
@@ -0,0 +1,190 @@
+# Connection pool shared by many ATM sessions.
+# ഓരോ ATM ഒബ്ജക്റ്റിനും സ്വന്തം കണക്ഷൻ തുറന്നു വെയ്ക്കുന്നതിനു പകരം, കുറച്ച് കണക്ഷനുകൾ
+# ഒരു പൂളിൽ സൂക്ഷിച്ച് ഓരോ ഓപ്പറേഷനും കടം വാങ്ങി തിരികെ കൊടുക്കുന്നു.
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+import metrics
+
+# Where MySQL/MariaDB packages put the server socket.
+MYSQL_SOCKETS = ("/var/run/mysqld/mysqld.sock", "/run/mysqld/mysqld.sock", "/tmp/mysql.sock",
+                 "/var/lib/mysql/mysql.sock")
+
+
+class PoolTimeout(Exception):
+    """Raised when no connection becomes free within the borrow timeout."""
+
+
+def find_socket(host):
+    """The local server's Unix socket when `host` is this machine, else None (use TCP)."""
+    if host not in ("localhost", "127.0.0.1", "::1"):
+        return None
+    return next((path for path in MYSQL_SOCKETS if os.path.exists(path)), None)
+
+
+def connection_errors():
+    """Exceptions that mean the database is unreachable.
+
+    The driver's error class is only included once something has imported it, so
+    callers on SQLite or memory backends never pay for loading mysql.connector.
+    """
+    driver = sys.modules.get("mysql.connector")
+    return (PoolTimeout, driver.Error) if driver is not None else (PoolTimeout,)
+
+
+class ConnectionPool:
+    def __init__(self, host, user, password, database, size=5, max_overflow=5,
+                 idle_timeout=300, timeout=30, connect=None, unix_socket=None):
+        self.db_host = host
+        self.db_user = user
+        self.db_password = password
+        self.db_database = database
+        # Skips TCP (and its handshake) for a server on this machine.
+        self.unix_socket = unix_socket
+        self.size = size
+        self.max_overflow = max_overflow
+        self.idle_timeout = idle_timeout
+        self.timeout = timeout
+        self._connect_fn = connect
+        self._idle = []
+        self._open = 0
+        self._closed = False
+        self._cond = threading.Condition()
+        self.borrows = 0
+        self.waits = 0
+        self.wait_time = 0.0
+
+    def _connect(self):
+        """Opens a new database connection, instrumented if metrics are enabled."""
+        connection = self._open_connection()
+        return metrics.instrument(connection) if metrics.REGISTRY.enabled else connection
+
+    def _open_connection(self):
+        if self._connect_fn is not None:
+            return self._connect_fn()
+        import mysql.connector
+        from mysql.connector.constants import ClientFlag
+        options = {"unix_socket": self.unix_socket} if self.unix_socket else {"host": self.db_host}
+        # FOUND_ROWS makes rowcount report matched rows, so guarded UPDATEs can be checked.
+        return mysql.connector.connect(
+            user=self.db_user,
+            password=self.db_password,
+            database=self.db_database,
+            client_flags=[ClientFlag.FOUND_ROWS],
+            **options
+        )
+
+    def _is_alive(self, connection):
+        """Health check run on every borrow of an idle connection."""
+        try:
+            is_connected = getattr(connection, "is_connected", None)
+            return is_connected() if is_connected else True
+        except Exception:
+            return False
+
+    def _close_quietly(self, connection):
+        try:
+            connection.close()
+        except Exception:
+            pass
+
+    def _expire_idle(self, now):
+        """Drops idle connections unused for longer than idle_timeout. Caller holds the lock."""
+        expired = [item for item in self._idle if now - item[1] > self.idle_timeout]
+        if expired:
+            self._idle = [item for item in self._idle if now - item[1] <= self.idle_timeout]
+            self._open -= len(expired)
+        return [connection for connection, _ in expired]
+
+    def acquire(self):
+        """Borrows a connection, waiting up to `timeout` seconds for one to be returned."""
+        start = time.monotonic()
+        waited = False
+        connection = None
+        with self._cond:
+            if self._closed:
+                raise PoolTimeout("The connection pool is closed.")
+            while True:
+                for stale in self._expire_idle(time.monotonic()):
+                    self._close_quietly(stale)
+                if self._idle:
+                    connection = self._idle.pop()[0]
+                    break
+                if self._open < self.size + self.max_overflow:
+                    self._open += 1
+                    break
+                remaining = self.timeout - (time.monotonic() - start)
+                if remaining <= 0:
+                    raise PoolTimeout(f"No connection available after {self.timeout}s.")
+                waited = True
+                self._cond.wait(remaining)
+            self.borrows += 1
+            if waited:
+                self.waits += 1
+                self.wait_time += time.monotonic() - start
+
+        if connection is not None and self._is_alive(connection):
+            return connection
+        if connection is not None:
+            self._close_quietly(connection)
+        try:
+            return self._connect()
+        except Exception:
+            with self._cond:
+                self._open -= 1
+                self._cond.notify()
+            raise
+
+    def release(self, connection, discard=False):
+        """Returns a borrowed connection; overflow connections are closed instead of kept."""
+        with self._cond:
+            keep = not discard and not self._closed and len(self._idle) < self.size
+            if keep:
+                self._idle.append((connection, time.monotonic()))
+            else:
+                self._open -= 1
+            self._cond.notify()
+        if not keep:
+            self._close_quietly(connection)
+
+    @contextmanager
+    def connection(self):
+        """Borrows a connection for the duration of a `with` block."""
+        connection = self.acquire()
+        try:
+            yield connection
+        except Exception:
+            try:
+                connection.rollback()
+                broken = False
+            except Exception:
+                broken = True
+            self.release(connection, discard=broken)
+            raise
+        self.release(connection)
+
+    def stats(self):
+        """Returns borrow/wait counters and the number of open and idle connections."""
+        with self._cond:
+            return {
+                "size": self.size,
+                "max_overflow": self.max_overflow,
+                "open": self._open,
+                "idle": len(self._idle),
+                "borrows": self.borrows,
+                "waits": self.waits,
+                "wait_time": self.wait_time,
+            }
+
+    def close(self):
+        """Closes every idle connection; borrowed ones are closed when returned."""
+        with self._cond:
+            self._closed = True
+            idle, self._idle = self._idle, []
+            self._open -= len(idle)
+            self._cond.notify_all()
+        for connection, _ in idle:
+            self._close_quietly(connection)
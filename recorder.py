@@ -0,0 +1,122 @@
+# Opt-in operation log for replaying real load.
+# ഓരോ AccountService ഓപ്പറേഷന്റെയും സമയം, തരം, യൂസർ, തുക, എടുത്ത സമയം, ഫലം എന്നിവ ഒരു JSONL
+# ഫയലിൽ ഓരോ വരിയായി എഴുതുന്നു. replay.py ഈ ലോഗ് ഏത് ബാക്കെൻഡിലേക്കും വീണ്ടും ഓടിക്കുന്നു.
+# പാസ്‌വേഡുകൾ ഒരിക്കലും ലോഗിൽ എഴുതില്ല.
+#
+# Record format (one JSON object per line, after a {"version": 1, "started": ...} header):
+#   {"t": 12.345678, "op": "withdraw", "user": 5, "amount": "500.00", "ms": 1.204}
+#   {"t": 12.4, "op": "login", "user": "alice", "id": 5, "ms": 310.5}
+#   {"t": 13.0, "op": "transfer", "user": 5, "to": 9, "amount": "20", "ms": 2.1, "error": "InsufficientFunds"}
+# t is seconds since the recorder started, taken when the operation began; ms is how long it took.
+import gzip
+import json
+import threading
+import time
+from datetime import datetime
+
+LOG_VERSION = 1
+
+
+class OperationRecorder:
+    """Writes one JSONL record per operation; shared by every session thread.
+
+    A path ending in .gz is written gzip-compressed. Records are buffered; close() flushes them.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        opener = gzip.open if path.endswith(".gz") else open
+        self.file = opener(path, "wt", encoding="utf-8")
+        self.lock = threading.Lock()
+        self.origin = time.perf_counter()
+        self.records = 0
+        self._write({"version": LOG_VERSION, "started": datetime.now().isoformat(timespec="seconds")})
+
+    def _write(self, record):
+        line = json.dumps(record, separators=(",", ":")) + "\n"
+        with self.lock:
+            self.file.write(line)
+            self.records += "op" in record
+
+    def record(self, op, start, seconds, user, amount=None, to=None, user_id=None, error=None):
+        """Adds one operation that began at perf_counter() value `start` and took `seconds`."""
+        record = {"t": round(start - self.origin, 6), "op": op, "user": user}
+        if user_id is not None:
+            record["id"] = user_id
+        if to is not None:
+            record["to"] = to
+        if amount is not None:
+            record["amount"] = str(amount)
+        record["ms"] = round(seconds * 1000, 3)
+        if error is not None:
+            record["error"] = error
+        self._write(record)
+
+    def close(self):
+        with self.lock:
+            self.file.close()
+
+
+class RecordingService:
+    """Wraps an AccountService and records every call to an OperationRecorder.
+
+    Other attributes (backend, statement(), ...) pass straight through to the service.
+    """
+
+    def __init__(self, service, recorder):
+        self.service = service
+        self.recorder = recorder
+
+    def __getattr__(self, name):
+        return getattr(self.service, name)
+
+    def _call(self, op, fn, user, args, amount=None, to=None):
+        start = time.perf_counter()
+        error = user_id = None
+        try:
+            result = fn(*args)
+            if op == "login":
+                user_id = result.user_id
+            return result
+        except Exception as err:
+            error = type(err).__name__
+            raise
+        finally:
+            self.recorder.record(op, start, time.perf_counter() - start, user, amount, to, user_id, error)
+
+    def login(self, username, password, source=None):
+        return self._call("login", self.service.login, username, (username, password, source))
+
+    def balance(self, user_id):
+        return self._call("balance", self.service.balance, user_id, (user_id,))
+
+    def deposit(self, user_id, amount):
+        return self._call("deposit", self.service.deposit, user_id, (user_id, amount), amount)
+
+    def withdraw(self, user_id, amount):
+        return self._call("withdraw", self.service.withdraw, user_id, (user_id, amount), amount)
+
+    def transfer(self, user_id, to_user_id, amount):
+        return self._call("transfer", self.service.transfer, user_id, (user_id, to_user_id, amount), amount,
+                          to_user_id)
+
+    def change_password(self, user_id, current_password, new_password):
+        return self._call("change_password", self.service.change_password, user_id,
+                          (user_id, current_password, new_password))
+
+    def mini_statement(self, user_id, count=10):
+        return self._call("mini_statement", self.service.mini_statement, user_id, (user_id, count))
+
+
+def read_log(path):
+    """Yields the operation records of a log written by OperationRecorder, in file order."""
+    opener = gzip.open if path.endswith(".gz") else open
+    with opener(path, "rt", encoding="utf-8") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            if "op" in record:
+                yield record
+            elif record.get("version", LOG_VERSION) > LOG_VERSION:
+                raise ValueError(f"{path} was written by a newer recorder (version {record['version']}).")
@@ -0,0 +1,235 @@
+# Replays an operation log written by recorder.py against any backend.
+# റെക്കോർഡ് ചെയ്ത ഓപ്പറേഷനുകൾ അതേ ഇടവേളകളിൽ (അല്ലെങ്കിൽ N മടങ്ങ് വേഗത്തിൽ, അല്ലെങ്കിൽ കഴിയുന്നത്ര
+# വേഗത്തിൽ) വീണ്ടും ഓടിച്ച്, ഓരോ ഓപ്പറേഷന്റെയും latency വിതരണം യഥാർത്ഥ റണ്ണുമായി താരതമ്യം ചെയ്യുന്നു.
+# റോൾഔട്ടിന് മുമ്പ് പുതിയ ബാക്കെൻഡിന്റെയോ സെർവറിന്റെയോ ശേഷി പരീക്ഷിക്കാൻ.
+#
+# Usage:
+#   python server.py --record ops.jsonl.gz ...                  # or: python bench.py workload --record ops.jsonl
+#   python replay.py ops.jsonl.gz --sqlite copy.db                        # original timing (1x)
+#   python replay.py ops.jsonl.gz --sqlite copy.db --speed 4 --workers 16 # four times as fast
+#   python replay.py ops.jsonl.gz --sqlite :memory: --speed max --create-accounts 100000
+#   python replay.py ops.jsonl --password bench-password --output replay.json
+#
+# The log records user_ids, so replay against a copy of the recorded database, or pass
+# --create-accounts BALANCE to add every missing account first. Logins are replayed only
+# with --password (the log never holds passwords); password changes are never replayed,
+# since the new password is not known and later logins would fail.
+import argparse
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from bench import percentile, summarize, write_results
+from money import Money
+from recorder import read_log
+from service import AccountService, ATMError
+from storage import Account
+
+SKIPPED = ("change_password",)
+
+
+def parse_speed(text):
+    """'max' (no waiting), or a positive multiple of the recorded pace."""
+    if text == "max":
+        return None
+    speed = float(text)
+    if speed <= 0:
+        raise argparse.ArgumentTypeError("speed must be positive or 'max'")
+    return speed
+
+
+def load(path):
+    """Returns the log's records ordered by their start time."""
+    return sorted(read_log(path), key=lambda record: record["t"])
+
+
+def create_accounts(backend, records, balance, hasher, password=None):
+    """Adds every account the log refers to that the backend does not have; returns how many."""
+    names = {record["id"]: record["user"] for record in records if record["op"] == "login" and "id" in record}
+    user_ids = set(names)
+    for record in records:
+        if record["op"] != "login":
+            user_ids.add(record["user"])
+        if "to" in record:
+            user_ids.add(record["to"])
+    existing = {account.user_id for account in backend.export_accounts(sorted(user_ids))}
+    missing = sorted(user_ids - existing)
+    password_hash = hasher.hash(password or "replay")
+    for start in range(0, len(missing), 5000):
+        backend.import_accounts([Account(user_id, names.get(user_id, f"replay_user_{user_id}"), password_hash,
+                                         Money.of(balance), [], [])
+                                 for user_id in missing[start:start + 5000]])
+    return len(missing)
+
+
+def run_operation(service, record, password):
+    """Runs one logged operation; returns False for one that is not replayed."""
+    op, user = record["op"], record["user"]
+    if op == "login":
+        if password is None:
+            return False
+        service.login(user, password)
+    elif op == "balance":
+        service.balance(user)
+    elif op == "deposit":
+        service.deposit(user, record["amount"])
+    elif op == "withdraw":
+        service.withdraw(user, record["amount"])
+    elif op == "transfer":
+        service.transfer(user, record["to"], record["amount"])
+    elif op == "mini_statement":
+        service.mini_statement(user)
+    else:
+        return False
+    return True
+
+
+def replay(service, records, speed=1.0, workers=8, password=None):
+    """Drives the records through `service`; returns (timings, errors, lag, skipped, unexpected, elapsed).
+
+    With a speed, each operation starts (t - first t) / speed seconds after the replay began,
+    and lag holds how late it actually started. With speed None every operation is queued at
+    once. Operations run on `workers` threads; with one worker they run strictly in log order.
+    An exception other than ATMError counts as an error too, and unexpected maps its type name
+    to how often it was raised.
+    """
+    timings, errors, lag, unexpected = {}, {}, [], {}
+    skipped = 0
+    lock = threading.Lock()
+    # Keeps the queue short in max mode, so a long log is not all submitted up front.
+    slots = threading.BoundedSemaphore(workers * 4)
+    first = records[0]["t"] if records else 0.0
+
+    def task(record, due):
+        nonlocal skipped
+        start = time.perf_counter()
+        error = False
+        failure = None
+        try:
+            replayed = run_operation(service, record, password)
+        except ATMError:
+            replayed = error = True
+        except Exception as err:
+            replayed = error = True
+            failure = type(err).__name__
+        finally:
+            slots.release()
+        seconds = time.perf_counter() - start
+        with lock:
+            if failure is not None:
+                unexpected[failure] = unexpected.get(failure, 0) + 1
+            if not replayed:
+                skipped += 1
+                return
+            timings.setdefault(record["op"], []).append(seconds)
+            errors[record["op"]] = errors.get(record["op"], 0) + error
+            if due is not None:
+                lag.append(start - due)
+
+    origin = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        for record in records:
+            if record["op"] in SKIPPED:
+                skipped += 1
+                continue
+            due = None
+            if speed is not None:
+                due = origin + (record["t"] - first) / speed
+                delay = due - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+            slots.acquire()
+            pool.submit(task, record, due)
+    return timings, errors, lag, skipped, unexpected, time.perf_counter() - origin
+
+
+def original_results(records):
+    """summarize() of the recorded run, from its logged start times and durations."""
+    if not records:
+        return {"total": summarize([], 0.0)}
+    elapsed = max(record["t"] + record["ms"] / 1000 for record in records) - records[0]["t"]
+    timings, errors = {}, {}
+    for record in records:
+        timings.setdefault(record["op"], []).append(record["ms"] / 1000)
+        errors[record["op"]] = errors.get(record["op"], 0) + ("error" in record)
+    results = {op: summarize(timings[op], elapsed, errors[op]) for op in timings}
+    results["total"] = summarize([t for op in timings for t in timings[op]], elapsed, sum(errors.values()))
+    return results
+
+
+def print_comparison(original, replayed):
+    if not original.get("total", {}).get("count") or not replayed.get("total", {}).get("count"):
+        print("No operations to compare.")
+        return
+    print(f"{'operation':<16}{'count':>8}{'errors':>13}{'p50 ms':>18}{'p95 ms':>18}{'p99 ms':>18}{'p99':>9}")
+    for op, row in replayed.items():
+        old = original.get(op)
+        if old is None:
+            continue
+        change = f"{(row['p99_ms'] / old['p99_ms'] - 1) * 100:+.0f}%" if old["p99_ms"] else "-"
+        print(f"{op:<16}{row['count']:>8}{old['errors']:>6} → {row['errors']:<4}"
+              + "".join(f"{old[key]:>8.2f} → {row[key]:<6.2f}" for key in ("p50_ms", "p95_ms", "p99_ms"))
+              + f"{change:>9}")
+    print(f"throughput {original['total']['throughput']:.0f} ops/s recorded, "
+          f"{replayed['total']['throughput']:.0f} ops/s replayed")
+
+
+def main():
+    import passwords
+    from storage import add_arguments, open_backend
+
+    parser = argparse.ArgumentParser(description="Replay a recorded operation log and compare latencies")
+    parser.add_argument("log", help="a log written with --record (.jsonl or .jsonl.gz)")
+    parser.add_argument("--speed", type=parse_speed, default=1.0,
+                        help="multiple of the recorded pace (default 1), or 'max' for no waiting")
+    parser.add_argument("--workers", type=int, default=8, help="concurrent replay threads")
+    parser.add_argument("--password", help="replay logins with this password for every user")
+    parser.add_argument("--create-accounts", type=int, metavar="BALANCE",
+                        help="first add the accounts the log uses that are missing, with this balance")
+    parser.add_argument("--output", help="write both runs' results to this JSON file")
+    add_arguments(parser)
+    passwords.add_arguments(parser)
+    args = parser.parse_args()
+
+    records = load(args.log)
+    if not records:
+        parser.error(f"{args.log} has no operations")
+    backend = open_backend(args)
+    hasher = passwords.open_hasher(args)
+    try:
+        if args.create_accounts is not None:
+            created = create_accounts(backend, records, args.create_accounts, hasher, args.password)
+            print(f"Created {created} accounts.")
+        service = AccountService(backend, passwords=hasher)
+        pace = "max speed" if args.speed is None else f"{args.speed:g}x"
+        print(f"Replaying {len(records)} operations at {pace} with {args.workers} workers...")
+        timings, errors, lag, skipped, unexpected, elapsed = replay(service, records, args.speed, args.workers,
+                                                                    args.password)
+    finally:
+        hasher.close()
+        backend.close()
+
+    if not timings:
+        raise SystemExit(f"❌ No replayable operations in {args.log}: {skipped} skipped "
+                         "(logins need --password, password changes are never replayed).")
+    original = original_results([record for record in records if record["op"] in timings])
+    replayed = {op: summarize(timings[op], elapsed, errors[op]) for op in timings}
+    replayed["total"] = summarize([t for op in timings for t in timings[op]], elapsed, sum(errors.values()))
+    print_comparison(original, replayed)
+    if skipped:
+        print(f"{skipped} operations not replayed (logins without --password, password changes).")
+    if unexpected:
+        print(f"❌ {sum(unexpected.values())} operations failed with unexpected errors (counted as errors): "
+              + ", ".join(f"{name} ×{count}" for name, count in sorted(unexpected.items())))
+    if lag:
+        lag.sort()
+        print(f"start lag p50 {percentile(lag, 0.50) * 1000:.2f} ms, p99 {percentile(lag, 0.99) * 1000:.2f} ms "
+              "(high lag means the target could not keep up with the pace)")
+    if args.output:
+        config = {key: value for key, value in vars(args).items() if key not in ("db_password", "password")}
+        write_results(args.output, "replay", config, {"original": original, "replay": replayed,
+                                                      "skipped": skipped, "unexpected": unexpected})
+
+
+if __name__ == "__main__":
+    main()
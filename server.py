@@ -0,0 +1,206 @@
+# asyncio session server speaking the ATM menu operations as a line protocol.
+# ഒരു പ്രോസസ്സിൽ തന്നെ ആയിരക്കണക്കിന് സെഷനുകൾ കൈകാര്യം ചെയ്യാം; ഡാറ്റാബേസ് ജോലികൾ ത്രെഡ് പൂളിലേക്ക് മാറ്റുന്നതിനാൽ
+# ഒരു സെഷന്റെ ക്വറി മറ്റൊന്നിനെ തടയില്ല.
+#
+# Protocol (one command per line, one reply per line):
+#   LOGIN <username> <password>   -> OK <username>
+#   BALANCE                       -> OK <balance>
+#   DEPOSIT <amount>              -> OK <balance>
+#   WITHDRAW <amount>             -> OK <balance>
+#   TRANSFER <user_id> <amount>   -> OK <balance>
+#   PASSWORD <current> <new>      -> OK
+#   LOGOUT                        -> OK
+#   METRICS                       -> OK <metrics as one-line JSON, with login throttle counters>
+#   QUIT                          -> OK (connection is closed)
+# Errors are returned as: ERR <message>
+import argparse
+import asyncio
+import json
+import signal
+from concurrent.futures import ThreadPoolExecutor
+
+import metrics
+from money import Money
+from service import ATMError
+
+MAX_LINE = 1024
+
+
+class Session:
+    """Per-connection state; replaces ATM.logged_in_user."""
+    __slots__ = ("user_id", "username", "source")
+
+    def __init__(self, source=None):
+        self.user_id = None
+        self.username = None
+        # Client address failed logins are counted against; None on a Unix socket.
+        self.source = source
+
+
+class ATMServer:
+    def __init__(self, service, workers=32):
+        self.service = service
+        # Service calls block on the database, so they run here instead of on the event loop.
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="atm-db")
+        self.sessions = 0
+        self.commands = 0
+
+    async def _call(self, fn, *args):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, fn, *args)
+
+    async def handle_command(self, session, line):
+        """Runs one protocol line for a session and returns the reply line."""
+        parts = line.split()
+        if not parts:
+            return "ERR Empty command."
+        command, args = parts[0].upper(), parts[1:]
+        self.commands += 1
+
+        if command == "QUIT":
+            return "OK"
+        if command == "METRICS":
+            snapshot = metrics.REGISTRY.snapshot()
+            throttle = getattr(self.service, "throttle", None)
+            if throttle is not None:
+                snapshot["throttle"] = await self._call(throttle.stats)
+            return "OK " + json.dumps(snapshot, separators=(",", ":"))
+        if command == "LOGIN":
+            if len(args) != 2:
+                return "ERR Usage: LOGIN <username> <password>"
+            user = await self._call(self.service.login, args[0], args[1], session.source)
+            session.user_id, session.username = user.user_id, user.username
+            return f"OK {session.username}"
+        if session.user_id is None:
+            return "ERR Please log in first."
+        if command == "LOGOUT":
+            session.user_id = session.username = None
+            return "OK"
+        if command == "BALANCE":
+            result = await self._call(self.service.balance, session.user_id)
+            return f"OK {result.balance:.2f}"
+        if command in ("DEPOSIT", "WITHDRAW"):
+            if len(args) != 1:
+                return f"ERR Usage: {command} <amount>"
+            try:
+                amount = Money.parse(args[0])
+            except ValueError:
+                return "ERR Invalid amount. Please enter a number."
+            operation = self.service.deposit if command == "DEPOSIT" else self.service.withdraw
+            result = await self._call(operation, session.user_id, amount)
+            return f"OK {result.balance:.2f}"
+        if command == "TRANSFER":
+            if len(args) != 2:
+                return "ERR Usage: TRANSFER <user_id> <amount>"
+            try:
+                to_user_id, amount = int(args[0]), Money.parse(args[1])
+            except ValueError:
+                return "ERR Invalid input. Please enter a number."
+            result = await self._call(self.service.transfer, session.user_id, to_user_id, amount)
+            return f"OK {result.balance:.2f}"
+        if command == "PASSWORD":
+            if len(args) != 2:
+                return "ERR Usage: PASSWORD <current> <new>"
+            await self._call(self.service.change_password, session.user_id, args[0], args[1])
+            return "OK"
+        return "ERR Unknown command."
+
+    async def handle_client(self, reader, writer):
+        """Serves one connection until QUIT or EOF."""
+        peer = writer.get_extra_info("peername")
+        session = Session(peer[0] if isinstance(peer, tuple) else None)
+        self.sessions += 1
+        try:
+            while True:
+                try:
+                    line = await reader.readline()
+                except (ConnectionError, asyncio.LimitOverrunError, ValueError):
+                    break
+                if not line:
+                    break
+                text = line.decode("utf-8", "replace").strip()
+                try:
+                    reply = await self.handle_command(session, text)
+                except ATMError as err:
+                    reply = f"ERR {err}"
+                except Exception as err:
+                    reply = f"ERR An error occurred: {err}"
+                writer.write(reply.encode("utf-8") + b"\n")
+                await writer.drain()
+                if text.upper().split()[:1] == ["QUIT"]:
+                    break
+        finally:
+            self.sessions -= 1
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except ConnectionError:
+                pass
+
+    async def start(self, host="127.0.0.1", port=8765, path=None):
+        """Starts listening on TCP, or on a Unix socket when `path` is given."""
+        if path:
+            return await asyncio.start_unix_server(self.handle_client, path=path, limit=MAX_LINE)
+        return await asyncio.start_server(self.handle_client, host, port, limit=MAX_LINE)
+
+    def close(self):
+        self.executor.shutdown(wait=True)
+
+
+async def serve(service, host="127.0.0.1", port=8765, path=None, workers=32):
+    """Runs an ATMServer for `service` until cancelled; SIGTERM cancels it too."""
+    try:
+        # A service manager stops us with SIGTERM; unwind like Ctrl-C, so main() flushes and closes.
+        asyncio.get_running_loop().add_signal_handler(signal.SIGTERM, asyncio.current_task().cancel)
+    except NotImplementedError:
+        pass
+    atm_server = ATMServer(service, workers)
+    server = await atm_server.start(host, port, path)
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        atm_server.close()
+
+
+def main():
+    import passwords
+    import throttle
+    from recorder import OperationRecorder, RecordingService
+    from service import AccountService
+    from storage import add_arguments, open_backend
+
+    parser = argparse.ArgumentParser(description="ATM session server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--unix", help="listen on this Unix socket path instead of TCP")
+    parser.add_argument("--workers", type=int, default=32)
+    parser.add_argument("--record", metavar="PATH", help="log every operation to PATH for replay.py (.gz to compress)")
+    add_arguments(parser)
+    passwords.add_arguments(parser)
+    throttle.add_arguments(parser)
+    args = parser.parse_args()
+
+    backend = open_backend(args)
+    hasher = passwords.open_hasher(args)
+    limiter = throttle.open_throttle(args)
+    service = AccountService(backend, passwords=hasher, throttle=limiter)
+    recorder = None
+    if args.record:
+        recorder = OperationRecorder(args.record)
+        service = RecordingService(service, recorder)
+    try:
+        asyncio.run(serve(service, args.host, args.port, args.unix, args.workers))
+    except (KeyboardInterrupt, asyncio.CancelledError):
+        pass
+    finally:
+        if recorder is not None:
+            recorder.close()
+        if limiter is not None:
+            limiter.close()
+        hasher.close()
+        backend.close()
+
+
+if __name__ == "__main__":
+    main()
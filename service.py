@@ -0,0 +1,215 @@
+# Headless account engine used by the ATM menus.
+# input()/print() ഒന്നും ഇല്ലാതെ, ഫലങ്ങൾ Result ആയും പിഴവുകൾ എക്സെപ്ഷനുകളായും തിരികെ നൽകുന്നു.
+# അതുകൊണ്ട് ഇതേ കോഡ് ബാച്ച് ജോലികളിലും ലോഡ് ടെസ്റ്റുകളിലും നെറ്റ്‌വർക്ക് സെർവറിലും ഉപയോഗിക്കാം.
+from metrics import operation
+from money import Money
+from passwords import PasswordHasher
+
+
+class ATMError(Exception):
+    """Base class for errors returned by AccountService."""
+
+
+class InvalidAmount(ATMError):
+    """The amount is not a positive number."""
+
+
+class InsufficientFunds(ATMError):
+    """The account balance is lower than the requested withdrawal."""
+
+
+class DailyLimitExceeded(ATMError):
+    """The withdrawal would take the day's withdrawals over the daily limit."""
+
+
+class InvalidTransfer(ATMError):
+    """The transfer cannot be made between these two accounts."""
+
+
+class AuthenticationFailed(ATMError):
+    """The username or password is wrong."""
+
+
+class AccountNotFound(ATMError):
+    """No account exists with the given user_id."""
+
+
+class LoginThrottled(ATMError):
+    """Too many failed logins for this username or source; the attempt was not checked."""
+
+
+class Result:
+    """Outcome of one account operation."""
+    __slots__ = ("operation", "user_id", "amount", "balance")
+
+    def __init__(self, operation, user_id, amount=None, balance=None):
+        self.operation = operation
+        self.user_id = user_id
+        self.amount = amount
+        self.balance = balance
+
+    def __repr__(self):
+        return (f"Result(operation={self.operation!r}, user_id={self.user_id!r}, "
+                f"amount={self.amount!r}, balance={self.balance!r})")
+
+
+class AccountSession:
+    """A logged-in user: only what the menus and server need, never the password hash."""
+    __slots__ = ("user_id", "username")
+
+    def __init__(self, user_id, username):
+        self.user_id = user_id
+        self.username = username
+
+    def __repr__(self):
+        return f"AccountSession(user_id={self.user_id!r}, username={self.username!r})"
+
+
+class AccountService:
+    def __init__(self, backend, journal=True, journal_writer=None, daily_withdrawal_limit=None, passwords=None,
+                 throttle=None):
+        # backend is a storage.StorageBackend: MySQL, SQLite or in-memory.
+        self.backend = backend
+        # atm.py works without the transactions table, atm-update.py records every operation.
+        self.journal = journal
+        # With a JournalWriter the transactions row is written after the balance commit,
+        # batched with other sessions' rows, instead of inside the same transaction.
+        self.journal_writer = journal_writer
+        # Checked against the backend's daily_totals row, in the same transaction as the withdrawal.
+        self.daily_withdrawal_limit = None if daily_withdrawal_limit is None else Money.of(daily_withdrawal_limit)
+        if self.daily_withdrawal_limit is not None and not backend.keeps_daily_totals():
+            # Refused here: the backend would otherwise skip the limit on every withdrawal.
+            raise ValueError("A daily withdrawal limit needs a backend that keeps daily totals "
+                             "(MySQL: daily_totals=True, or --daily-totals).")
+        # passwords.PasswordHasher, or a PasswordVerifier to hash in worker processes.
+        self.passwords = passwords if passwords is not None else PasswordHasher()
+        # Optional throttle.LoginThrottle; attempts it refuses never reach the backend.
+        self.throttle = throttle
+        self._unknown_user_hash = None
+
+    def _journal_record(self, transaction_type, amount=None):
+        """The journal entry to write inside the operation's own transaction, if any."""
+        if not self.journal or self.journal_writer is not None:
+            return None
+        return (transaction_type, amount)
+
+    def _write_behind(self, user_id, transaction_type, amount=None):
+        """Hands a committed operation to the JournalWriter, if one is configured."""
+        if self.journal and self.journal_writer is not None:
+            self.journal_writer.append(user_id, transaction_type, amount)
+
+    def _check_amount(self, amount):
+        """Returns the amount as Money; callers may pass Money, int rupees, Decimal or str."""
+        try:
+            amount = Money.of(amount) if amount is not None else None
+        except ValueError:
+            raise InvalidAmount("The amount must be a number with at most two decimal places.")
+        if amount is None or amount <= 0:
+            raise InvalidAmount("The amount must be greater than zero.")
+        return amount
+
+    def _login_failed(self, username, source):
+        if self.throttle is not None:
+            self.throttle.failure(username, source)
+        return AuthenticationFailed("Invalid username or password.")
+
+    @operation("login")
+    def login(self, username, password, source=None):
+        """Returns an AccountSession for a valid username and password.
+
+        A stored hash from an older cost setting (or a legacy plaintext password) is
+        replaced with a fresh hash once the password has been verified. `source` is the
+        client address the throttle counts failures against, if known.
+        """
+        if self.throttle is not None:
+            self.throttle.check(username, source)
+        user_data = self.backend.find_user(username)
+        if not user_data:
+            # Spend the same hashing time as for a real account, so timing does not reveal usernames.
+            if self._unknown_user_hash is None:
+                self._unknown_user_hash = self.passwords.hash(username)
+            self.passwords.verify(password, self._unknown_user_hash)
+            raise self._login_failed(username, source)
+        stored = user_data.password
+        if not self.passwords.verify(password, stored):
+            raise self._login_failed(username, source)
+        if self.passwords.needs_rehash(stored):
+            rehashed = self.passwords.hash(password)
+            # Skipped if the password changed meanwhile; the next login tries again.
+            self.backend.update_password(user_data.user_id, stored, rehashed)
+        if self.throttle is not None:
+            self.throttle.success(username, source)
+        return AccountSession(user_data.user_id, user_data.username)
+
+    @operation("balance")
+    def balance(self, user_id):
+        """Reads the current balance of an account."""
+        balance = self.backend.get_balance(user_id)
+        if balance is None:
+            raise AccountNotFound(f"No account with user_id {user_id}.")
+        return Result("balance", user_id, balance=balance)
+
+    @operation("deposit")
+    def deposit(self, user_id, amount):
+        """Adds money to an account and returns the new balance."""
+        amount = self._check_amount(amount)
+        balance = self.backend.post(user_id, amount, self._journal_record('deposit', amount))
+        self._write_behind(user_id, 'deposit', amount)
+        return Result("deposit", user_id, amount, balance)
+
+    @operation("withdraw")
+    def withdraw(self, user_id, amount):
+        """Takes money out of an account if the balance allows it."""
+        amount = self._check_amount(amount)
+        balance = self.backend.post(user_id, -amount, self._journal_record('withdraw', amount),
+                                    self.daily_withdrawal_limit)
+        self._write_behind(user_id, 'withdraw', amount)
+        return Result("withdraw", user_id, amount, balance)
+
+    @operation("transfer")
+    def transfer(self, user_id, to_user_id, amount):
+        """Moves money to another account; both legs commit together or not at all."""
+        amount = self._check_amount(amount)
+        if to_user_id == user_id:
+            raise InvalidTransfer("Cannot transfer to the same account.")
+        balance = self.backend.transfer(user_id, to_user_id, amount,
+                                        journal=self.journal and self.journal_writer is None)
+        self._write_behind(user_id, 'transfer_out', amount)
+        self._write_behind(to_user_id, 'transfer_in', amount)
+        return Result("transfer", user_id, amount, balance)
+
+    @operation("change_password")
+    def change_password(self, user_id, current_password, new_password):
+        """Replaces the password if current_password matches the stored one."""
+        stored = self.backend.get_password(user_id)
+        if stored is None or not self.passwords.verify(current_password, stored):
+            raise AuthenticationFailed("Incorrect current password.")
+        if not self.backend.update_password(user_id, stored, self.passwords.hash(new_password),
+                                            self._journal_record('password_change')):
+            raise AuthenticationFailed("Incorrect current password.")
+        self._write_behind(user_id, 'password_change')
+        return Result("password_change", user_id)
+
+    @operation("daily_totals")
+    def daily_totals(self, user_id, day=None):
+        """Returns the deposit and withdrawal totals of one day (today by default)."""
+        return self.backend.get_daily_totals(user_id, day)
+
+    @operation("mini_statement")
+    def mini_statement(self, user_id, count=10):
+        """Returns the last `count` journal entries, newest first."""
+        return self.backend.journal_page(user_id, count)
+
+    def statement(self, user_id, start=None, end=None, page_size=500):
+        """Yields journal entries with start <= timestamp < end, oldest first, one page at a time.
+
+        Pages continue from the last row seen (keyset pagination), so each page costs the
+        same index range scan however deep into the history it is.
+        """
+        after = None
+        while True:
+            page = self.backend.journal_page(user_id, page_size, after, start, end, descending=False)
+            yield from page
+            if len(page) < page_size:
+                return
+            after = (page[-1].timestamp, page[-1].transaction_id)
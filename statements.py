@@ -0,0 +1,72 @@
+# Prepared statements reused per pooled connection.
+# ATM ഉപയോഗിക്കുന്നത് ഏകദേശം ആറ് SQL സ്ട്രിംഗുകൾ മാത്രമാണ്. ഓരോ കോളിലും അവ ടെക്സ്റ്റ് ആയി അയച്ച് സെർവർ
+# വീണ്ടും പാഴ്‌സ് ചെയ്യുന്നതിനു പകരം, ഓരോ കണക്ഷനിലും ഒരിക്കൽ prepare ചെയ്ത് ആ cursor വീണ്ടും ഉപയോഗിക്കുന്നു.
+# prepared statements പിന്തുണയില്ലാത്തിടത്ത് സാധാരണ ടെക്സ്റ്റ് cursor ലേക്ക് മാറുന്നു.
+import threading
+import weakref
+
+# ER_UNSUPPORTED_PS: the statement cannot be prepared, run it as text instead.
+UNSUPPORTED_PS = 1295
+
+
+class StatementCache:
+    """Cursors per (connection, SQL string): prepared ones when the driver and server allow it.
+
+    A cached cursor is never closed by the caller; it lives as long as its connection.
+    Callers must read all rows of a SELECT (fetchall) before the cursor is used again.
+    """
+
+    def __init__(self, prepared=True):
+        self.prepared = prepared
+        self._cursors = weakref.WeakKeyDictionary()
+        self._text_only = set()
+        self._lock = threading.Lock()
+        self.prepares = 0
+        self.reuses = 0
+        self.fallbacks = 0
+
+    def _cursor(self, connection, sql):
+        # A pooled connection is used by one thread at a time; the lock only guards the dicts.
+        with self._lock:
+            try:
+                cursors = self._cursors.setdefault(connection, {})
+            except TypeError:
+                # Not weakly referenceable (a bare C connection): nothing to key the cache on.
+                cursors = {}
+            cursor = cursors.get(sql)
+            if cursor is not None:
+                self.reuses += 1
+                return cursor
+        cursor = None
+        if self.prepared and sql not in self._text_only:
+            try:
+                cursor = connection.cursor(prepared=True)
+                self.prepares += 1
+            except Exception:
+                # This driver (or its C extension) has no prepared cursors at all.
+                self.prepared = False
+        if cursor is None:
+            cursor = connection.cursor()
+        with self._lock:
+            cursors[sql] = cursor
+        return cursor
+
+    def execute(self, connection, sql, values=()):
+        """Runs `sql` on `connection` through its cached cursor and returns that cursor."""
+        cursor = self._cursor(connection, sql)
+        try:
+            cursor.execute(sql, values)
+        except Exception as err:
+            if getattr(err, "errno", None) != UNSUPPORTED_PS:
+                raise
+            with self._lock:
+                self._text_only.add(sql)
+                self.fallbacks += 1
+                self._cursors.get(connection, {}).pop(sql, None)
+            cursor = self._cursor(connection, sql)
+            cursor.execute(sql, values)
+        return cursor
+
+    def stats(self):
+        return {"prepared": self.prepared, "prepares": self.prepares, "reuses": self.reuses,
+                "fallbacks": self.fallbacks, "text_only": len(self._text_only)}
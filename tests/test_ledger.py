@@ -0,0 +1,43 @@
+# Loading an account the ledger has not seen reads the backend; that read must not block other accounts.
+import threading
+
+from ledger import LedgerBackend
+from money import Money
+from storage import MemoryBackend
+
+
+class SlowBalanceBackend(MemoryBackend):
+    """Holds get_balance() of one account until released."""
+
+    def __init__(self, slow_user_id):
+        super().__init__()
+        self.slow_user_id = slow_user_id
+        self.reading = threading.Event()
+        self.release = threading.Event()
+
+    def get_balance(self, user_id):
+        if user_id == self.slow_user_id:
+            self.reading.set()
+            assert self.release.wait(10)
+        return super().get_balance(user_id)
+
+
+def test_slow_account_load_does_not_block_other_postings(tmp_path):
+    backend = SlowBalanceBackend(slow_user_id=2)
+    backend.add_users([("alice", "hash", 100)])
+    ledger = LedgerBackend(backend, str(tmp_path / "atm.wal"), slots=1024, checkpoint_interval=60)
+    try:
+        backend.add_users([("bob", "hash", 50)])
+        loader = threading.Thread(target=ledger.post, args=(2, Money.of(5)))
+        loader.start()
+        assert backend.reading.wait(10)
+        done = threading.Event()
+        threading.Thread(target=lambda: (ledger.post(1, Money.of(10)), done.set())).start()
+        assert done.wait(5), "a posting to a loaded account waited for another account's backend read"
+        backend.release.set()
+        loader.join(10)
+        assert ledger.get_balance(1) == Money.of(110)
+        assert ledger.get_balance(2) == Money.of(55)
+    finally:
+        backend.release.set()
+        ledger.close()
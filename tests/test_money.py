@@ -0,0 +1,15 @@
+# Money compares equal to plain ints as whole rupees, so it has to hash like them too.
+from money import Money
+
+
+def test_whole_rupees_hash_like_ints():
+    assert Money.of(1) == 1
+    assert hash(Money.of(1)) == hash(1)
+    assert hash(Money(-500)) == hash(-5)
+    assert {1: "one"}[Money(100)] == "one"
+    assert Money.of(5) in {5}
+
+
+def test_equal_amounts_hash_alike():
+    assert {Money(150), Money.parse("1.50")} == {Money(150)}
+    assert Money(150) != 1
@@ -0,0 +1,46 @@
+# A log with nothing replayable (logins, but no --password) must end with a message, not a KeyError.
+import os
+import subprocess
+import sys
+import time
+
+import replay
+from recorder import OperationRecorder, read_log
+from service import AccountService
+from storage import MemoryBackend
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def write_login_log(path):
+    recorder = OperationRecorder(str(path))
+    for user_id in (1, 2, 3):
+        recorder.record("login", time.perf_counter(), 0.002, f"user_{user_id}", user_id=user_id)
+    recorder.close()
+
+
+def test_login_only_log_replays_nothing(tmp_path, capsys):
+    path = tmp_path / "logins.jsonl"
+    write_login_log(path)
+    records = replay.load(str(path))
+    assert len(records) == 3
+    timings, errors, lag, skipped, unexpected, elapsed = replay.replay(
+        AccountService(MemoryBackend()), records, speed=None, workers=2)
+    assert timings == {} and unexpected == {}
+    assert skipped == 3
+
+    original = replay.original_results([record for record in records if record["op"] in timings])
+    assert original["total"]["count"] == 0
+    replay.print_comparison(original, {"total": replay.summarize([], elapsed)})
+    assert "No operations to compare." in capsys.readouterr().out
+
+
+def test_login_only_log_exits_with_a_message(tmp_path):
+    path = tmp_path / "logins.jsonl"
+    write_login_log(path)
+    assert len(list(read_log(str(path)))) == 3
+    result = subprocess.run([sys.executable, os.path.join(ROOT, "replay.py"), str(path), "--memory",
+                             "--speed", "max"], capture_output=True, text=True, cwd=ROOT)
+    assert result.returncode == 1
+    assert "No replayable operations" in result.stderr
+    assert "Traceback" not in result.stderr
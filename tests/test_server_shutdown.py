@@ -0,0 +1,39 @@
+# SIGTERM is how a service manager stops the server: the recorder's buffered tail must reach the file.
+import os
+import signal
+import socket
+import subprocess
+import sys
+import time
+
+import pytest
+
+from recorder import read_log
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@pytest.mark.skipif(not hasattr(socket, "AF_UNIX"), reason="needs Unix sockets")
+def test_sigterm_flushes_the_recorder(tmp_path):
+    path = str(tmp_path / "atm.sock")
+    log = str(tmp_path / "ops.jsonl")
+    server = subprocess.Popen([sys.executable, os.path.join(ROOT, "server.py"), "--memory", "--unix", path,
+                               "--record", log], cwd=ROOT)
+    try:
+        deadline = time.monotonic() + 10
+        while not os.path.exists(path):
+            assert server.poll() is None and time.monotonic() < deadline
+            time.sleep(0.05)
+        with socket.socket(socket.AF_UNIX) as client:
+            client.connect(path)
+            stream = client.makefile("rw")
+            for _ in range(3):
+                stream.write("LOGIN nobody wrong\n")
+                stream.flush()
+                assert stream.readline().startswith("ERR")
+        server.send_signal(signal.SIGTERM)
+        assert server.wait(timeout=10) == 0
+    finally:
+        if server.poll() is None:
+            server.kill()
+    assert [record["op"] for record in read_log(log)] == ["login"] * 3
@@ -0,0 +1,53 @@
+# Parallel withdrawals must never overdraw an account: the balance check and the
+# update happen in one guarded transaction in every backend.
+import threading
+
+import pytest
+
+from money import Money
+from service import AccountService, InsufficientFunds
+from storage import MemoryBackend, SQLiteBackend
+
+THREADS = 300
+BALANCE = 100
+
+
+@pytest.fixture(params=["sqlite", "memory"])
+def backend(request):
+    backend = SQLiteBackend(":memory:") if request.param == "sqlite" else MemoryBackend()
+    backend.add_users([("alice", "unused-hash", BALANCE)])
+    yield backend
+    backend.close()
+
+
+def test_parallel_withdrawals_never_overdraw(backend):
+    service = AccountService(backend)
+    user_id = backend.find_user("alice").user_id
+    barrier = threading.Barrier(THREADS)
+    lock = threading.Lock()
+    outcomes = {"ok": 0, "insufficient": 0, "other": []}
+
+    def withdraw():
+        barrier.wait()
+        try:
+            service.withdraw(user_id, 1)
+            outcome = "ok"
+        except InsufficientFunds:
+            outcome = "insufficient"
+        except Exception as err:
+            with lock:
+                outcomes["other"].append(err)
+            return
+        with lock:
+            outcomes[outcome] += 1
+
+    threads = [threading.Thread(target=withdraw) for _ in range(THREADS)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert outcomes["other"] == []
+    assert outcomes["ok"] == BALANCE
+    assert outcomes["insufficient"] == THREADS - BALANCE
+    assert backend.get_balance(user_id) == Money.of(0)
@@ -0,0 +1,235 @@
+# Login throttling shared by every ATM process on the host.
+# തെറ്റായ പാസ്‌വേഡുകൾ ആവർത്തിച്ച് ശ്രമിക്കുന്ന ക്ലയന്റിന് ഓരോ ശ്രമത്തിലും ഡാറ്റാബേസ് ക്വറിയും
+# പാസ്‌വേഡ് ഹാഷിങ്ങും ഉണ്ടാക്കാൻ കഴിയാതിരിക്കാൻ, ഓരോ യൂസർനെയിമിന്റെയും ഓരോ സോഴ്സിന്റെയും (IP)
+# പരാജയങ്ങൾ ഒരു sliding window യിൽ എണ്ണി, exponential backoff ഉം lockout ഉം നടപ്പാക്കുന്നു.
+# എല്ലാ വർക്കർ പ്രോസസ്സുകളും ഒരേ SQLite ഫയൽ ഉപയോഗിക്കുന്നതിനാൽ ഈ നില അവർക്കിടയിൽ പങ്കിടുന്നു.
+#
+# Usage:
+#   python server.py --throttle-db /var/tmp/atm-throttle.db      # give every worker process the same file
+#   python throttle.py status --throttle-db /var/tmp/atm-throttle.db
+#   python throttle.py unlock user:alice --throttle-db /var/tmp/atm-throttle.db
+#
+# A refused attempt costs one primary-key read of this table: no accounts query, no password hash.
+import argparse
+import math
+import sqlite3
+import threading
+import time
+
+import metrics
+from service import LoginThrottled
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS login_failures (
+    key TEXT PRIMARY KEY,
+    window_start REAL NOT NULL,
+    current INTEGER NOT NULL,
+    previous INTEGER NOT NULL,
+    locked_until REAL NOT NULL,
+    updated REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_login_failures_updated ON login_failures (updated);
+"""
+
+# Idle rows are pruned after every this many failures.
+PRUNE_EVERY = 256
+
+
+def _keys(username, source):
+    return [f"user:{username}"] + ([f"source:{source}"] if source else [])
+
+
+class LoginThrottle:
+    """Failed-login counts per username and per source in a SQLite table, with backoff and lockout.
+
+    Each key holds the failure counts of the current and the previous fixed window; their
+    weighted sum is the sliding-window estimate, so a row never grows. Past `free_attempts`
+    a username waits base_delay, then twice that, up to max_delay, before its next attempt;
+    at user_lockout (or source_lockout for a source) failures the key is locked for `lockout`
+    seconds. Rows idle for two windows are pruned and at most max_keys rows are kept.
+    """
+
+    def __init__(self, path=":memory:", window=900.0, free_attempts=3, base_delay=1.0, max_delay=60.0,
+                 user_lockout=10, source_lockout=50, lockout=900.0, max_keys=100000):
+        self.path = path
+        self.window = window
+        self.free_attempts = free_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.limits = {"user": user_lockout, "source": source_lockout}
+        self.lockout = lockout
+        self.max_keys = max_keys
+        # Other processes write the same file; wait for their short transactions instead of failing.
+        self.connection = sqlite3.connect(path, check_same_thread=False, isolation_level=None, timeout=5.0)
+        self.lock = threading.Lock()
+        self.checks = 0
+        self.refused = 0
+        self.failures = 0
+        self.successes = 0
+        self.lockouts = 0
+        self.pruned = 0
+        with self.lock:
+            if path != ":memory:":
+                # Readers never wait for a writer, and a commit does not fsync.
+                self.connection.execute("PRAGMA journal_mode=WAL")
+                self.connection.execute("PRAGMA synchronous=NORMAL")
+            self.connection.executescript(SCHEMA)
+
+    def check(self, username, source=None):
+        """Raises LoginThrottled if the username or the source may not try to log in yet."""
+        keys = _keys(username, source)
+        now = time.time()
+        with self.lock:
+            self.checks += 1
+            row = self.connection.execute(
+                f"SELECT MAX(locked_until) FROM login_failures WHERE key IN ({', '.join('?' * len(keys))})",
+                keys).fetchone()
+            locked_until = row[0] or 0.0
+            if locked_until <= now:
+                return
+            self.refused += 1
+        if metrics.REGISTRY.enabled:
+            metrics.REGISTRY.increment("login_refused")
+        raise LoginThrottled(f"Too many failed logins. Try again in {math.ceil(locked_until - now)} seconds.")
+
+    def _roll(self, row, now):
+        """Moves a key's (window_start, current, previous, locked_until) forward to the window holding now."""
+        if row is None:
+            return now - now % self.window, 0, 0, 0.0
+        window_start, current, previous, locked_until = row
+        if now - window_start >= 2 * self.window:
+            return now - now % self.window, 0, 0, locked_until
+        if now - window_start >= self.window:
+            return window_start + self.window, 0, current, locked_until
+        return row
+
+    def failure(self, username, source=None):
+        """Counts one failed login against the username and the source."""
+        now = time.time()
+        with self.lock:
+            self.failures += 1
+            cursor = self.connection.cursor()
+            cursor.execute("BEGIN IMMEDIATE")
+            try:
+                for key in _keys(username, source):
+                    row = cursor.execute("SELECT window_start, current, previous, locked_until FROM login_failures "
+                                         "WHERE key = ?", (key,)).fetchone()
+                    window_start, current, previous, locked_until = self._roll(row, now)
+                    current += 1
+                    count = current + previous * (1 - (now - window_start) / self.window)
+                    if count >= self.limits[key.partition(":")[0]]:
+                        if locked_until <= now:
+                            self.lockouts += 1
+                        locked_until = max(locked_until, now + self.lockout)
+                    elif key.startswith("user:") and count > self.free_attempts:
+                        delay = min(self.max_delay, self.base_delay * 2 ** (int(count) - self.free_attempts - 1))
+                        locked_until = max(locked_until, now + delay)
+                    cursor.execute("INSERT OR REPLACE INTO login_failures "
+                                   "(key, window_start, current, previous, locked_until, updated) "
+                                   "VALUES (?, ?, ?, ?, ?, ?)",
+                                   (key, window_start, current, previous, locked_until, now))
+                if self.failures % PRUNE_EVERY == 0:
+                    self._prune(cursor, now)
+                cursor.execute("COMMIT")
+            except BaseException:
+                cursor.execute("ROLLBACK")
+                raise
+        if metrics.REGISTRY.enabled:
+            metrics.REGISTRY.increment("login_failures")
+
+    def _prune(self, cursor, now):
+        """Drops idle, unlocked rows, then the least recently updated ones above max_keys; caller holds the lock."""
+        cursor.execute("DELETE FROM login_failures WHERE updated < ? AND locked_until < ?",
+                       (now - 2 * self.window, now))
+        self.pruned += cursor.rowcount
+        excess = cursor.execute("SELECT COUNT(*) FROM login_failures").fetchone()[0] - self.max_keys
+        if excess > 0:
+            cursor.execute("DELETE FROM login_failures WHERE key IN "
+                           "(SELECT key FROM login_failures ORDER BY updated LIMIT ?)", (excess,))
+            self.pruned += cursor.rowcount
+
+    def success(self, username, source=None):
+        """Clears the username's failures; the source keeps its count."""
+        with self.lock:
+            self.successes += 1
+            self.connection.execute("DELETE FROM login_failures WHERE key = ?", (f"user:{username}",))
+
+    def unlock(self, key):
+        """Forgets one 'user:<name>' or 'source:<address>' key; returns True if it was tracked."""
+        with self.lock:
+            return self.connection.execute("DELETE FROM login_failures WHERE key = ?", (key,)).rowcount > 0
+
+    def locked(self, limit=20):
+        """Returns [(key, seconds left)] for the keys locked right now, longest first."""
+        now = time.time()
+        with self.lock:
+            rows = self.connection.execute("SELECT key, locked_until FROM login_failures WHERE locked_until > ? "
+                                           "ORDER BY locked_until DESC LIMIT ?", (now, limit)).fetchall()
+        return [(key, locked_until - now) for key, locked_until in rows]
+
+    def stats(self):
+        """This process's counters and the shared table's size."""
+        with self.lock:
+            keys, locked = self.connection.execute(
+                "SELECT COUNT(*), COUNT(CASE WHEN locked_until > ? THEN 1 END) FROM login_failures",
+                (time.time(),)).fetchone()
+            return {
+                "checks": self.checks,
+                "refused": self.refused,
+                "failures": self.failures,
+                "successes": self.successes,
+                "lockouts": self.lockouts,
+                "pruned": self.pruned,
+                "keys": keys,
+                "locked_keys": locked,
+            }
+
+    def close(self):
+        with self.lock:
+            self.connection.close()
+
+
+def add_arguments(parser):
+    """Adds the login throttling options shared by the command-line tools."""
+    parser.add_argument("--throttle-db", metavar="PATH",
+                        help="SQLite file of failed logins shared by every process (:memory: for this one only)")
+    parser.add_argument("--throttle-window", type=float, default=900.0, help="seconds failed logins are counted")
+    parser.add_argument("--user-lockout", type=int, default=10, help="failures that lock a username")
+    parser.add_argument("--source-lockout", type=int, default=50, help="failures that lock a client address")
+    parser.add_argument("--lockout", type=float, default=900.0, help="seconds a lockout lasts")
+
+
+def open_throttle(args):
+    """Creates the LoginThrottle selected by the options from add_arguments(), or None."""
+    if not args.throttle_db:
+        return None
+    return LoginThrottle(args.throttle_db, window=args.throttle_window, user_lockout=args.user_lockout,
+                         source_lockout=args.source_lockout, lockout=args.lockout)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Inspect or clear login throttling state")
+    parser.add_argument("command", choices=("status", "unlock"))
+    parser.add_argument("key", nargs="?", help="for unlock: user:<username> or source:<address>")
+    add_arguments(parser)
+    args = parser.parse_args()
+    if not args.throttle_db:
+        parser.error("--throttle-db is required")
+
+    throttle = open_throttle(args)
+    try:
+        if args.command == "unlock":
+            if not args.key:
+                parser.error("unlock needs a key, e.g. user:alice")
+            print(f"✅ {args.key} unlocked." if throttle.unlock(args.key) else f"{args.key} is not tracked.")
+            return
+        stats = throttle.stats()
+        print(f"{stats['keys']} keys tracked, {stats['locked_keys']} locked.")
+        for key, seconds in throttle.locked():
+            print(f"  🔒 {key:<40} {seconds:>6.0f}s left")
+    finally:
+        throttle.close()
+
+
+if __name__ == "__main__":
+    main()